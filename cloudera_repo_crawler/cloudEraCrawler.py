@@ -1,61 +1,82 @@
-import json
-import requests
 import xmltodict
-from pymongo import MongoClient
+from xml.parsers.expat import ExpatError
 from bs4 import BeautifulSoup
 from collections import OrderedDict
-import time
-import subprocess
 import os
-import re
 from dotenv import load_dotenv
 from urllib.parse import urljoin
 from packaging import version  # helps compare versions properly
 from datetime import datetime
 import urllib.parse
+import asyncio
+import sys
 import random
 
-POM_TEMPLATE = """<project>
-    <modelVersion>4.0.0</modelVersion>
-    <groupId>temp-group</groupId>
-    <artifactId>temp-artifact</artifactId>
-    <version>1.0</version>
-    <repositories>
-        <repository>
-            <id>cloudera-public</id>
-            <url>https://repository.cloudera.com/artifactory/public/</url>
-        </repository>
-    </repositories>
-    <dependencies>
-        <dependency>
-            <groupId>{{GROUP_ID}}</groupId>
-            <artifactId>{{ARTIFACT_ID}}</artifactId>
-            <version>{{VERSION}}</version>
-        </dependency>
-    </dependencies>
-</project>"""
-
-# Define the POM file path in the current directory
-POM_FILE_PATH = os.path.join(os.getcwd(), "pom.xml")
-
-# Create the POM file
-with open(POM_FILE_PATH, "w") as pom_file:
-    pom_file.write(POM_TEMPLATE)
-
-print(f"POM file created at: {POM_FILE_PATH}")
+# The shared modules read their settings (caches, worker counts) when imported, so load .env first
+load_dotenv()
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from crawler_common import directory_walker, export, http_client, rate_control, storage
+from crawler_common.directory_walker import DirectoryWalker
+from crawler_common.engine import CrawlEngine
+from crawler_common.dead_letter import open_dead_letters
+from crawler_common.frontier import open_frontier
+from crawler_common.negative_cache import PERMANENT_FAILURES, SERVER_ERROR, classify_status, open_negative_cache
+from crawler_common.gav_cache import GavCache
+from crawler_common.http_cache import is_offline_miss
+from crawler_common.known_ids import KnownIds
+from crawler_common.local_repository import DEFAULT_LOCAL_REPOSITORY, LocalRepository
+from crawler_common.maven_metadata import is_snapshot, latest_release
+from crawler_common.maven_runner import MavenWorkerPool
+from crawler_common.pom_resolver import MAX_PARENT_DEPTH, PomResolver, UnresolvableModel
+from crawler_common.resolution_cache import ResolutionCache
+from crawler_common.retry import call_with_retry
+from crawler_common.storage import WriteBehindStore, artifact_upsert, parent_link
+
+# Extra repositories mvn needs besides Maven Central
+MAVEN_REPOSITORIES = {"cloudera-public": "https://repository.cloudera.com/repository/public/"}
+
+# Number of parallel mvn workers (defaults to the core count) and the local repository they share
+MAVEN_WORKERS = int(os.getenv("MAVEN_WORKERS", os.cpu_count() or 1))
+MAVEN_LOCAL_REPOSITORY = os.getenv("MAVEN_LOCAL_REPOSITORY", DEFAULT_LOCAL_REPOSITORY)
+
+# mvn workers, each with its own temporary project directory
+maven_pool = MavenWorkerPool(MAVEN_WORKERS, MAVEN_REPOSITORIES, MAVEN_LOCAL_REPOSITORY)
+
+# POMs and metadata the crawler downloads go into mvn's local repository (and POMs mvn downloaded are read
+# from it), so each file crosses the network once
+if MAVEN_LOCAL_REPOSITORY:
+    http_client.set_local_repository(
+        LocalRepository(MAVEN_LOCAL_REPOSITORY, MAVEN_REPOSITORIES))
 
 # MongoDB Connection
-load_dotenv()
 MONGO_URI = os.getenv("MONGO_URI")
-client = MongoClient(MONGO_URI)
+client = storage.get_client(MONGO_URI)
 db = client.cloudera_dependency_5
 collection = db.cloudera_dependencies_5
 
+# Writes are batched in the background so MongoDB latency stays off the crawl path
+store = WriteBehindStore(collection)
+
+# _ids already in the collection, checked in memory instead of one find_one per candidate
+known_ids = KnownIds(collection)
+
+# Crawl progress survives restarts (and is shared by all workers with FRONTIER_STORE=mongodb)
+frontier = open_frontier("cloudera", db)
+
+# Coordinates that recently failed (missing POMs, timeouts, failed resolutions), skipped until their TTL expires
+negative_cache = open_negative_cache("cloudera")
+
+# Items that still failed after their retries; REPLAY_DEAD_LETTERS=1 queues them again
+dead_letters = open_dead_letters("cloudera")
+
 # Cloudera URLs
 CLOUDERA_REPO_URL = "https://repository.cloudera.com/repository/public/{}/{}/{}/{}-{}.pom"
 CLOUDERA_DIRECTORY_URL = "https://repository.cloudera.com/service/rest/repository/browse/public/{}/{}/{}/"
 BASE_URL = "https://repository.cloudera.com/service/rest/repository/browse/public/"
 
+# Where the files of the directories browsed under BASE_URL are served
+CLOUDERA_FILE_ROOT = "https://repository.cloudera.com/repository/public/"
+
 def normalize_timestamp(raw_timestamp):
     """
     Convert 'Tue Jan 30 19:41:11 UTC 2024' 
@@ -71,12 +92,11 @@ def normalize_timestamp(raw_timestamp):
 
 def fetch_last_modified_and_size(group_id, artifact_id, version):
     """Fetches timestamp and JAR size from the Maven directory listing, handling different JAR naming patterns."""
-    time.sleep(0.2)  # Avoid throttling
     group_path = group_id.replace(".", "/")
     dir_url = CLOUDERA_DIRECTORY_URL.format(group_path, artifact_id, version)
 
     print(f"📂 Fetching directory: {dir_url}")
-    response = requests.get(dir_url)
+    response = http_client.get(dir_url)
     if response.status_code != 200:
         return "Unknown", "Unknown"
 
@@ -116,113 +136,126 @@ def resolve_placeholder(value, properties, project):
     return value
 
 def fetch_pom(group_id, artifact_id, version):
-    """Fetches the POM file content from Maven Central."""
+    """Fetches the POM file content from Maven Central (None while it is known to be missing)."""
     group_path = group_id.replace(".", "/")
     pom_url = CLOUDERA_REPO_URL.format(group_path, artifact_id, version, artifact_id, version)
+    pom_id = f"{group_id}:{artifact_id}:{version}"
+    if negative_cache.check(pom_id, (*PERMANENT_FAILURES, SERVER_ERROR)):
+        return None
 
-    response = requests.get(pom_url)
+    response = http_client.get(pom_url)
     if response.status_code == 200:
         return response.text
-    print(f"❌ POM not found for {group_id}:{artifact_id}:{version}")
-    return None  # Return None if POM not found
-
-def get_pom_properties(pom_xml, accumulated_properties):
+    if is_offline_miss(response):
+        print(f"❌ POM not in the offline HTTP cache: {group_id}:{artifact_id}:{version}")
+        return None
+    failure = classify_status(response.status_code)
+    if failure in PERMANENT_FAILURES:
+        # Parents and BOMs are fetched once for every artifact using them, so remember the ones that are missing
+        # (or refused)
+        negative_cache.record(pom_id, failure, f"HTTP {response.status_code}")
+        print(f"❌ POM not found for {group_id}:{artifact_id}:{version} (HTTP {response.status_code})")
+        return None  # Return None if POM not found
+    # 408/429/5xx may go away: the crawl engine retries them and dead-letters the artifact if they do not
+    response.raise_for_status()
+    return None
+
+# In-process effective POM resolver, reusing fetch_pom for parents and BOMs
+resolver = PomResolver(fetch_pom)
+
+# Unresolved properties of parent POMs merged with their ancestors', shared by every artifact with that parent
+parent_properties = GavCache("parent-properties")
+
+# Direct dependencies by content hash of POM + parent chain, shared with the other Maven-family crawlers
+resolutions = ResolutionCache("resolutions")
+
+# Errors of a POM that is not well-formed or not shaped as expected; fetch errors are left to the crawl's retries
+POM_PARSE_ERRORS = (ExpatError, KeyError, TypeError, AttributeError)
+
+def get_parent_properties(group_id, artifact_id, version, depth=0):
     """
-    Recursively fetches parent POM properties and merges them.
-    - accumulated_properties keeps track of all merged properties from parent POMs.
+    Returns the properties a parent POM and its own parents define (closest POM wins), unresolved.
+    - Cached by GAV in memory and on disk, so each parent is fetched and parsed once.
     """
-    if not pom_xml:
-        return accumulated_properties
+    gav = (group_id, artifact_id, version)
+    cached = parent_properties.get(gav)
+    if cached is not None:
+        return cached
 
+    properties = OrderedDict()
+    pom_xml = fetch_pom(group_id, artifact_id, version)
     try:
-        pom_dict = xmltodict.parse(pom_xml)
-        project = pom_dict["project"]
+        project = xmltodict.parse(pom_xml)["project"] if pom_xml else {}
+
+        own_properties = project.get("properties", {})
+        if isinstance(own_properties, dict):
+            properties.update(own_properties)
 
-        # Extract and merge properties
+        # Check if the parent has its own parent
+        parent = project.get("parent")
+        if parent and depth < MAX_PARENT_DEPTH:
+            parent_group = resolve_placeholder(parent.get("groupId"), properties, project)
+            parent_artifact = resolve_placeholder(parent.get("artifactId"), properties, project)
+            parent_version = resolve_placeholder(parent.get("version"), properties, project)
+            for key, value in get_parent_properties(parent_group, parent_artifact, parent_version, depth + 1).items():
+                properties.setdefault(key, value)
+
+    except POM_PARSE_ERRORS as e:
+        print(f"⚠ Error parsing parent POM: {e}")
+        return properties
+
+    # A POM that is missing or does not parse is not cached, so a later lookup of this parent reads it again
+    if pom_xml:
+        parent_properties.put(gav, properties)
+    return properties
+
+def get_pom_properties(project, accumulated_properties):
+    """
+    Merges a parsed POM's properties onto the cached properties of its parent chain and resolves them.
+    - accumulated_properties keeps track of all merged properties; the POM's own values win.
+    """
+    try:
         properties = project.get("properties", {})
         if isinstance(properties, dict):
             for key, value in properties.items():
                 if key not in accumulated_properties:  # Preserve lowest-level properties
                     accumulated_properties[key] = value
 
-        # Resolve placeholders in properties
-        for key, value in accumulated_properties.items():
-            value = resolve_placeholder(value, accumulated_properties, project)
-            accumulated_properties[key] = value
-
-        # Check if the parent has its own parent
         parent = project.get("parent")
         if parent:
             parent_group = resolve_placeholder(parent.get("groupId"), accumulated_properties, project)
             parent_artifact = resolve_placeholder(parent.get("artifactId"), accumulated_properties, project)
             parent_version = resolve_placeholder(parent.get("version"), accumulated_properties, project)
-            parent_pom_xml = fetch_pom(parent_group, parent_artifact, parent_version)
-            return get_pom_properties(parent_pom_xml, accumulated_properties)
-
-    except Exception as e:
-        print(f"⚠ Error parsing parent POM: {e}")
+            for key, value in get_parent_properties(parent_group, parent_artifact, parent_version).items():
+                accumulated_properties.setdefault(key, value)
+
+        # Resolve placeholders in properties, following ${a} -> ${b} chains
+        for _ in range(MAX_PARENT_DEPTH):
+            changed = False
+            for key, value in accumulated_properties.items():
+                resolved = resolve_placeholder(value, accumulated_properties, project)
+                if resolved != value:
+                    accumulated_properties[key] = resolved
+                    changed = True
+            if not changed:
+                break
+
+    except POM_PARSE_ERRORS as e:
+        print(f"⚠ Error resolving POM properties: {e}")
 
     return accumulated_properties
 
-def modify_pom_file(group_id, artifact_id, version):
-    """Replaces placeholders in the POM file with actual values."""
-    with open(POM_FILE_PATH, "r") as file:
-        content = file.read()
-
-    content = content.replace("{{GROUP_ID}}", group_id)
-    content = content.replace("{{ARTIFACT_ID}}", artifact_id)
-    content = content.replace("{{VERSION}}", version)
-
-    with open(POM_FILE_PATH, "w") as file:
-        file.write(content)
-
-def restore_pom_file(group_id, artifact_id, version):
-
-    with open(POM_FILE_PATH, "w") as file:
-        file.write(POM_TEMPLATE)
-
-def get_direct_dependencies(group_id, artifact_id, version):
-    """Extracts direct dependencies using the mvn dependency:tree command."""
-    modify_pom_file(group_id, artifact_id, version)  # Replace placeholders with real values
-    dependencies = []
-
+def resolve_in_process(group_id, artifact_id, version, pom_xml):
+    """Resolves direct dependencies from the effective POM; returns None when mvn is needed."""
     try:
-        result = subprocess.run(
-            ["mvn", "dependency:tree","-Ddepth=2", "-f", POM_FILE_PATH],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            timeout=30,
-            shell=True,
-        )
-
-        if result.returncode == 0:
-            clean_lines = [
-                line.replace("[INFO] ", "", 1) if line.startswith("[INFO] ") else line
-                for line in result.stdout.splitlines()
-            ]
-            for line in clean_lines:
-                if "+- " in line or "\\- " in line:
-                    parts = line.split(":")
-                    depth = (len(line) - len(line.lstrip(" |"))) // 2
-                    group_id = re.sub(r'^[^a-zA-Z0-9]+', '', parts[0])
-                    artifact_id = parts[1]
-                    version = parts[3]
-                    scope = parts[4]
-                    if(depth == 1):
-                        dependency = f"{group_id}:{artifact_id}:{version}:{scope}"
-                        dependencies.append(dependency)
-        else:
-            print(f"⚠ Error running mvn dependency:tree: {result.stderr}")
-            dependencies = None  # Set to None if there's an error
-
-    # except subprocess.TimeoutExpired:
-    #     print(f"⚠ Timeout while extracting dependencies for {group_id}:{artifact_id}:{version}")
-    except Exception as e:
-        print(f"⚠ Error extracting dependencies: {e}")
-        dependencies = None  # Set to None if there's an error
-    restore_pom_file(group_id, artifact_id, version)
-    return dependencies
+        return resolver.direct_dependencies(group_id, artifact_id, version, pom_xml)
+    except UnresolvableModel as e:
+        print(f"⚠ Falling back to mvn for {group_id}:{artifact_id}:{version}: {e}")
+        return None
+
+async def get_direct_dependencies(coordinates):
+    """Extracts direct dependencies for a batch of artifacts with one mvn dependency:tree run (bisecting failures)."""
+    return await maven_pool.resolve(coordinates)
 
 def parse_pom(pom_xml, group_id, artifact_id, version):
     """Parses POM XML, extracts dependencies, and resolves properties from parent POMs."""
@@ -238,7 +271,7 @@ def parse_pom(pom_xml, group_id, artifact_id, version):
         if "project" in pom_dict:
             project = pom_dict["project"]
 
-            properties = get_pom_properties(pom_xml, properties)
+            properties = get_pom_properties(project, properties)
 
             # Extract parent module details
             parent = project.get("parent")
@@ -266,122 +299,141 @@ def parse_pom(pom_xml, group_id, artifact_id, version):
 
         return description, source_code_url, parent_module, child_modules
 
-    except Exception as e:
+    except POM_PARSE_ERRORS as e:
         print(f"⚠ Error parsing POM: {e}")
         print(description)
         print(child_modules)
 
     return description, source_code_url, parent_module, child_modules
 
+# Fields of a parent module that has not been processed yet (description None flags it as unprocessed)
+PARENT_PLACEHOLDER = {
+    "last_modified": None,
+    "jar_size": None,
+    "description": None,
+    "direct_dependencies": [],
+    "source_code_url": None,
+    "parent_module": None,
+}
+
 def store_dependency(group_id, artifact_id, version, last_modified, jar_size, description, direct_deps, source_code_url, parent_module, child_modules):
-    """Stores dependency in MongoDB with last modified timestamp and JAR size."""
+    """
+    Queues the dependency's MongoDB upserts (with last modified timestamp and JAR size) on the write-behind store.
+    - Returns a Future that completes once MongoDB has acknowledged the writes.
+    """
     dependency_id = f"{group_id}:{artifact_id}:{version}"
+    operations = []
 
-    # Check if the parent exists in the database
+    # Add the current module to its parent's child list, creating a placeholder for an unprocessed parent
     if parent_module != "Unknown":
-        parent_entry = collection.find_one({"_id": parent_module})
-
-        if parent_entry:
-            # Append current module to parent's child list if not already present
-            collection.update_one(
-                {"_id": parent_module},
-                {"$addToSet": {"child_modules": dependency_id}}
-            )
-            print(f"Added {dependency_id} as a child to {parent_module}")
-
-        else:
-            # Use an existing field as a flag (e.g., description will be None if not processed)
-            collection.insert_one({
-                "_id": parent_module,
-                "last_modified": None,
-                "jar_size": None,
-                "description": None,  # Flag: Description is None before processing
-                "direct_dependencies": [],
-                "source_code_url": None,
-                "parent_module": None,
-                "child_modules": [dependency_id]
-            })
-            print(f"Created placeholder for unprocessed parent: {parent_module}")
-
-    existing_entry = collection.find_one({"_id": dependency_id})
-    if existing_entry:
-        # Ensure new child modules are appended without duplication
-        collection.update_one(
-            {"_id": dependency_id},
-            {
-                "$set": {
-                    "last_modified": last_modified,
-                    "jar_size": jar_size,
-                    "description": description,
-                    "direct_dependencies": direct_deps,
-                    "source_code_url": source_code_url,
-                    "parent_module": parent_module
-                },
-                "$addToSet": {"child_modules": {"$each": child_modules}}
-            }
-        )
-        print(f"✅ Updated DB: {dependency_id} (Last Modified: {last_modified}, Size: {jar_size})")
-        
-    else:
-        # Insert a new entry if it doesn't exist
-        collection.insert_one({
-            "_id": dependency_id,
-            "last_modified": last_modified,
-            "jar_size": jar_size,
-            "description": description,
-            "direct_dependencies": direct_deps,
-            "source_code_url": source_code_url,
-            "parent_module": parent_module,
-            "child_modules": child_modules
-        })
-        print(f"✅ Added to DB: {dependency_id} (Last Modified: {last_modified}, Size: {jar_size})")
+        operations.append(parent_link(parent_module, dependency_id, PARENT_PLACEHOLDER))
+        known_ids.add(parent_module)
+
+    # Insert or update the entry; new child modules are appended without duplication
+    operations.append(artifact_upsert(dependency_id, {
+        "last_modified": last_modified,
+        "jar_size": jar_size,
+        "description": description,
+        "direct_dependencies": direct_deps,
+        "source_code_url": source_code_url,
+        "parent_module": parent_module
+    }, child_modules))
+
+    written = store.add(*operations)
+    known_ids.add(dependency_id)
+    print(f"✅ Stored {dependency_id} (Last Modified: {last_modified}, Size: {jar_size})")
+    return written
+
+def fetch_artifact(group_id, artifact_id, version):
+    """Fetches directory details and the POM of an artifact (network-bound crawl stage)."""
+    # Fetch last modified timestamp & JAR size
+    last_modified, jar_size = fetch_last_modified_and_size(group_id, artifact_id, version)
+
+    # Try fetching the POM
+    pom_xml = fetch_pom(group_id, artifact_id, version)
+    if not pom_xml:
+        return None
+
+    # Parse the POM for other details
+    description, source_code_url, parent_module, child_modules = parse_pom(pom_xml, group_id, artifact_id, version)
+
+    # Reuse the dependencies resolved from the same content before; otherwise resolve in-process when
+    # possible, the rest go to batched mvn
+    resolution_key = resolutions.content_key(resolver, group_id, artifact_id, version, pom_xml)
+    direct_deps = resolutions.get(resolution_key, version)
+    if direct_deps is None:
+        direct_deps = resolve_in_process(group_id, artifact_id, version, pom_xml)
+        resolutions.put(resolution_key, version, direct_deps)
+
+    return {
+        "group_id": group_id,
+        "artifact_id": artifact_id,
+        "version": version,
+        "last_modified": last_modified,
+        "jar_size": jar_size,
+        "description": description,
+        "source_code_url": source_code_url,
+        "parent_module": parent_module,
+        "child_modules": child_modules,
+        "direct_dependencies": direct_deps,
+        "resolution_key": resolution_key,
+    }
+
+def is_resolved(record):
+    """Checks if the in-process resolver already produced the direct dependencies."""
+    return record["direct_dependencies"] is not None
+
+async def resolve_artifacts(records):
+    """Resolves a batch of artifacts with mvn dependency:tree (resolution crawl stage)."""
+    coordinates = [(record["group_id"], record["artifact_id"], record["version"]) for record in records]
+    for record, direct_deps in zip(records, await get_direct_dependencies(coordinates)):
+        record["direct_dependencies"] = direct_deps
+        resolutions.put(record["resolution_key"], record["version"], direct_deps)
+    # Store only if direct dependencies are resolved
+    return [record if is_resolved(record) else None for record in records]
+
+def store_artifact(record):
+    """Stores a resolved artifact in MongoDB (storage crawl stage)."""
+    return store_dependency(record["group_id"], record["artifact_id"], record["version"], record["last_modified"], record["jar_size"], record["description"], record["direct_dependencies"], record["source_code_url"], record["parent_module"], record["child_modules"])
+
+def expand_artifact(record):
+    """Yields the direct dependencies of a stored artifact so they get crawled too."""
+    for dependency in record["direct_dependencies"]:
+        dep_group_id, dep_artifact_id, dep_version = dependency.split(":")[:3]
+        yield dep_group_id, dep_artifact_id, dep_version
+
+def is_processed(dependency_id):
+    """Checks if the dependency exists in MongoDB (answered from the in-memory id set)."""
+    return dependency_id in known_ids
+
+def build_engine():
+    """Creates the crawl engine wired to this repository's stage functions."""
+    return CrawlEngine(
+        list_artifacts, fetch_artifact, resolve_artifacts, store_artifact,
+        expand=expand_artifact,
+        is_known=is_processed,
+        is_resolved=is_resolved,
+        workers={"resolve": maven_pool.size},
+        resolve_batch_size=25,
+        frontier=frontier,
+        negative_cache=negative_cache,
+        dead_letters=dead_letters,
+    )
 
 def process_dependency(group_id, artifact_id, version):
     """Processes a single dependency and its direct dependencies."""
-    try:
-        # Fetch last modified timestamp & JAR size
-        last_modified, jar_size = fetch_last_modified_and_size(group_id, artifact_id, version)
+    asyncio.run(build_engine().run(artifacts=[(group_id, artifact_id, version)]))
 
-        # Try fetching the POM
-        pom_xml = fetch_pom(group_id, artifact_id, version)
-        
-        direct_deps = []
-        description = "Unknown"
-        source_code_url = "Unknown"
-        parent_module = "Unknown"
-        child_modules = []
-
-        if pom_xml:
-            # Extract direct dependencies using mvn dependency:tree
-            direct_deps = get_direct_dependencies(group_id, artifact_id, version)
-
-            # Parse the POM for other details
-            description, source_code_url, parent_module, child_modules = parse_pom(pom_xml, group_id, artifact_id, version)
-
-        # Store in MongoDB only if POM was found and direct dependencies are resolved
-        if pom_xml and direct_deps is not None:
-            store_dependency(group_id, artifact_id, version, last_modified, jar_size, description, direct_deps, source_code_url, parent_module, child_modules)
-            for dependency in direct_deps:
-                dep_parts = dependency.split(":")
-                dep_group_id, dep_artifact_id, dep_version = dep_parts[:3]
-                dependency_id = f"{dep_group_id}:{dep_artifact_id}:{dep_version}"
-                # Check if the dependency exists
-                print(f"🔍 Processing direct dependency: {dependency_id}")
-                if collection.find_one({"_id": dependency_id}):
-                    print(f"Skipping (already processed): {dependency_id}")
-                    continue  # Skip if already processed
-                process_dependency(dep_group_id, dep_artifact_id, dep_version)
-                
-    except Exception as e:
-        print(f"Failed to process {dep_group_id}:{dep_artifact_id}:{dep_version}: {e}")
+def get_listing(url):
+    response = http_client.get(url)
+    if response.status_code not in (404, 410):
+        response.raise_for_status()
+    return response
 
 def list_subdirs(url):
-    """Return subdirectories from a Maven repo URL."""
-    try:
-        response = requests.get(url, timeout=10)
-        if response.status_code != 200:
-            return []
-    except requests.RequestException:
+    """Return subdirectories from a Maven repo URL (none if it does not exist); transient errors are retried, then raised."""
+    response = call_with_retry(get_listing, url)
+    if response.status_code != 200:
         return []
 
     soup = BeautifulSoup(response.text, "html.parser")
@@ -392,22 +444,57 @@ def list_subdirs(url):
             dirs.append(urljoin(url, href))
     return dirs
 
-def recurse_group(group_dir, depth):
-    artifact_dirs = []
-    if len(list_subdirs(group_dir)) == 0:
-        print(f"Reached version directory: {group_dir}")
-    elif depth < 5 and len(list_subdirs(group_dir)) > 0:
-        for dir in list_subdirs(group_dir):
-            if len(list_subdirs(dir)) > 0 and len(list_subdirs(list_subdirs(dir)[0])) > 0:
-                print(f"Recursing into: {dir} at depth {depth}")
-                artifact_dirs.extend(recurse_group(dir, depth + 1))
-            else:
-                print(f"Adding to artifact dirs: {dir}")
-                artifact_dirs.append(dir)
-    else:
-        print(f"Max depth reached in: {group_dir}")
-    
-    return artifact_dirs
+def find_latest_version(walker, artifact_dir):
+    """
+    Returns the version of an artifact to crawl.
+    - Reads <release>/<versions> from maven-metadata.xml; scrapes the directory listing only when there is none.
+    """
+    metadata = walker.metadata(artifact_dir)
+    if metadata is not None:
+        latest = latest_release(metadata)
+        if latest:
+            return latest
+
+    # Fallback: collect versions from the (already fetched) directory listing
+    versions = []
+    for version_dir in walker.listing(artifact_dir)[0]:
+        version_name = version_dir.rstrip("/").split("/")[-1]       # get the last component
+        version_name = urllib.parse.unquote(version_name)  # decode URL-encoded characters
+        version_name = os.path.basename(version_name)      # ensure it's clean
+        if not is_snapshot(version_name):
+            versions.append(version_name)
+
+    if not versions:
+        return None
+
+    # Pick the latest version (semantic comparison), keeping the name exactly as it appears in the repository
+    try:
+        return max(versions, key=version.parse)
+    except Exception:
+        # fallback: lexicographic max if parsing fails
+        return max(versions)
+
+def list_artifacts(group_dir):
+    """Yields the latest version of a sample of artifacts under a top-level group directory."""
+    # To handle nested groupIds, walk the whole subtree (each directory listing is fetched once)
+    walker = DirectoryWalker(file_roots={BASE_URL: CLOUDERA_FILE_ROOT})
+    artifact_dirs = walker.artifact_dirs(group_dir)
+
+    artifact_indexes = random.sample(range(0, len(artifact_dirs)), min(100, len(artifact_dirs)))
+    for index in artifact_indexes:
+        artifact_dir = artifact_dirs[index]
+        # Extract groupId and artifactId
+        parts = artifact_dir.replace(BASE_URL, "").strip("/").split("/")
+        group_id = ".".join(parts[:-1])
+        artifact_id = parts[-1]
+
+        latest = find_latest_version(walker, artifact_dir)
+        if not latest:
+            continue
+
+        if not (group_id.startswith("%23") or group_id.startswith("_") or group_id == ".."):
+            print(f"🔍 Processing: {group_id}:{artifact_id}:{latest}")
+            yield group_id, artifact_id, latest
 
 def get_all_dependencies(base=BASE_URL):
     """
@@ -416,46 +503,8 @@ def get_all_dependencies(base=BASE_URL):
     """
     # print(f"🌐 Starting crawl from: {base}")
     group_dirs = list_subdirs(base)
-    for group_dir in group_dirs[398:]: # Restarting from 398 due to interruption
-        if group_dir == base+".m2e/":
-            continue  # Skip this directory
-        # To handle nested groupIds, we need to go deeper
-        artifact_dirs = recurse_group(group_dir, 0)
-
-        artifact_indexes = random.sample(range(0, len(artifact_dirs)), min(100, len(artifact_dirs)))
-        for index in artifact_indexes:
-            artifact_dir = artifact_dirs[index]
-            # Extract groupId and artifactId
-            parts = artifact_dir.replace(BASE_URL, "").strip("/").split("/")
-            group_id = ".".join(parts[:-1])
-            artifact_id = parts[-1]
-
-            # Collect versions
-            versions = []
-            for version in list_subdirs(artifact_dir):
-                version_name = version.rstrip("/").split("/")[-1]       # get the last component
-                version_name = urllib.parse.unquote(version_name)  # decode URL-encoded characters
-                version_name = os.path.basename(version_name)      # ensure it's clean
-                versions.append(version_name)
-
-            if not versions:
-                continue
-
-            # Pick the latest version (semantic comparison)
-            try:
-                latest = str(max((version.parse(v) for v in versions)))
-            except Exception:
-                # fallback: lexicographic max if parsing fails
-                latest = max(versions)
-
-            if not (group_id.startswith("%23") or group_id.startswith("_") or group_id == ".."):
-                dependency_id = f"{group_id}:{artifact_id}:{latest}"
-                print(f"🔍 Processing: {dependency_id}")
-                # Check if the dependency exists 
-                if collection.find_one({"_id": dependency_id}):
-                    print(f"🔍 Skipping (already processed): {dependency_id}")
-                    continue  # Skip if already processed
-                process_dependency(group_id, artifact_id, latest)
+    group_dirs = [group_dir for group_dir in group_dirs if group_dir != base+".m2e/"] # skipping .m2e/
+    asyncio.run(build_engine().run(listing_items=group_dirs))
 
 # Run the script
 try:
@@ -479,14 +528,28 @@ try:
 except Exception as e:
     print(f"Error occurred or program was interrupted: {e}")
 finally:
-    # Clean up: remove the temporary POM file
-    if os.path.exists(POM_FILE_PATH):
-            os.remove(POM_FILE_PATH)
-            print(f"Deleted temporary POM file: {POM_FILE_PATH}")
-
-    # Export the database to a JSON file
-    print("Exporting database to cloudera_dependencies.json...")
-    data = list(collection.find({},))  # remove _id
-
-    with open("cloudera_dependencies.json", "w") as f:
-        json.dump(data, f, indent=2)
+    # Flush the writes still buffered before exporting
+    store.close()
+    print(f"🗄 Write-behind store: {store.stats()}, known ids: {known_ids.stats()}")
+    print(f"🧭 Frontier: {frontier.counts()}")
+    frontier.close()
+    print(f"⏭ Negative cache: {negative_cache.stats()}")
+    negative_cache.close()
+    print(f"📮 Dead letters: {len(dead_letters)} in {dead_letters.path}")
+    dead_letters.close()
+
+    # Clean up: remove the temporary mvn worker projects
+    maven_pool.close()
+    print(f"Deleted temporary mvn projects: {maven_pool.project_dirs}")
+    print(f"🌳 mvn resolution: {maven_pool.stats()}")
+
+    http_client.print_connection_stats()
+    rate_control.print_limits()
+    directory_walker.print_stats()
+    print(f"🗂 Parent properties cache: {parent_properties.stats()}, POM model cache: {resolver.models.stats()}")
+    print(f"🧮 Resolution cache: {resolutions.stats()}")
+
+    # Export the database to a JSON file (streamed; EXPORT_FORMAT selects ndjson and/or gzip)
+    print(f"Exporting database to {export.export_path('cloudera_dependencies.json')}...")
+    exported_path, exported = export.export_collection(collection, "cloudera_dependencies.json")
+    print(f"✅ Exported {exported} documents to {exported_path}")
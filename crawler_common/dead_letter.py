@@ -0,0 +1,96 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from crawler_common.gav_cache import DEFAULT_CACHE_DIR
+
+# One database per crawler; empty keeps dead letters in memory for the current run only
+DEAD_LETTER_DIR = os.getenv(
+    "DEAD_LETTER_DIR", os.path.join(DEFAULT_CACHE_DIR, "dead-letters") if DEFAULT_CACHE_DIR else "")
+
+# Queue the dead letters of earlier runs again when a crawl starts
+REPLAY_DEAD_LETTERS = os.getenv("REPLAY_DEAD_LETTERS", "").lower() in ("1", "true", "yes")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS letters (
+    key TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    depth INTEGER NOT NULL,
+    stage TEXT NOT NULL,
+    error TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    failed_at REAL NOT NULL
+)
+"""
+
+
+def dead_letter_path(name):
+    """Returns the database path of a crawler's dead letters, or ":memory:" when DEAD_LETTER_DIR is empty."""
+    if not DEAD_LETTER_DIR:
+        return ":memory:"
+    os.makedirs(DEAD_LETTER_DIR, exist_ok=True)
+    return os.path.join(DEAD_LETTER_DIR, f"{name}.sqlite")
+
+
+class DeadLetterQueue:
+    """
+    Crawl items that kept failing, kept in SQLite with the stage, error and number of attempts.
+    - Entries are frontier entries (key, kind, payload, priority, depth; see frontier.listing_entry and
+      frontier.artifact_entry), so replaying one only means queuing it again (CrawlEngine.run(replay=True)).
+    - An item that fails again replaces its entry; one that succeeds is removed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(SCHEMA)
+            self._keys = {row[0] for row in self._db.execute("SELECT key FROM letters")}
+
+    def add(self, entry, stage, error, attempts):
+        key, kind, payload, priority, depth = entry
+        with self._lock, self._db:
+            self._keys.add(key)
+            self._db.execute(
+                "INSERT OR REPLACE INTO letters VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, kind, json.dumps(payload), priority, depth, stage, str(error)[:1000], attempts, time.time()))
+
+    def remove(self, key):
+        with self._lock:
+            if key not in self._keys:
+                return
+            with self._db:
+                self._keys.discard(key)
+                self._db.execute("DELETE FROM letters WHERE key = ?", (key,))
+
+    def entries(self):
+        """Returns every dead letter as a frontier entry, oldest first."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT key, kind, payload, priority, depth FROM letters ORDER BY failed_at").fetchall()
+        return [(key, kind, json.loads(payload), priority, depth) for key, kind, payload, priority, depth in rows]
+
+    def failures(self):
+        """Returns {key: (stage, error, attempts)} for inspection."""
+        with self._lock:
+            rows = self._db.execute("SELECT key, stage, error, attempts FROM letters ORDER BY failed_at").fetchall()
+        return {key: (stage, error, attempts) for key, stage, error, attempts in rows}
+
+    def __len__(self):
+        with self._lock:
+            return len(self._keys)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def open_dead_letters(name):
+    """Opens the dead-letter queue of a crawler."""
+    return DeadLetterQueue(dead_letter_path(name))
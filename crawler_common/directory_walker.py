@@ -0,0 +1,172 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+from crawler_common import http_client
+from crawler_common.http_cache import is_offline_miss
+from crawler_common.maven_metadata import parse_metadata
+
+METADATA_FILE = "maven-metadata.xml"
+
+# Directories listed in parallel while walking one subtree, and how deep a group may nest
+WALK_WORKERS = 16
+MAX_WALK_DEPTH = 12
+
+GROUP, ARTIFACT, VERSION = "group", "artifact", "version"
+
+_stats = {"listings_fetched": 0, "listings_reused": 0, "metadata_fetched": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def parse_listing(html, url):
+    """
+    Splits an HTML directory listing into (subdirectory URLs, {file name: file URL}).
+    - File URLs are the listing's own links, which need not sit below the listing's URL (Nexus's browse UI
+      lists /service/rest/repository/browse/<repo>/... but links the files under /repository/<repo>/...).
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    dirs, files = [], {}
+    for link in soup.find_all("a"):
+        href = link.get("href")
+        if not href or href in ("../", "/") or href.startswith(("?", "#")):
+            continue
+        if href.endswith("/"):
+            dirs.append(urljoin(url, href))
+        else:
+            files[href.rsplit("/", 1)[-1]] = urljoin(url, href)
+    return dirs, files
+
+
+class DirectoryWalker:
+    """
+    Walks a Maven repository's HTML directory listings, fetching each directory exactly once.
+    - Listings and maven-metadata.xml files are memoized for the lifetime of the walker, so classifying
+      a node and reading its children or versions later never downloads the same document twice. Only
+      answers are memoized (a document, or its absence); other errors are raised for the crawl's retries.
+    - Nodes are classified from their contents instead of their depth, metadata first: a directory whose
+      maven-metadata.xml lists versions is an artifact (its listing is never fetched), one holding a POM is
+      a version, anything else a group.
+    - file_roots maps listing URL prefixes to the prefixes their files are served under, for repositories
+      whose browse UI lives elsewhere (Nexus: /service/rest/repository/browse/<repo>/ vs /repository/<repo>/).
+    - The directories of one level are fetched concurrently (breadth-first), so independent subtrees
+      are walked at the same time.
+    """
+
+    def __init__(self, workers=WALK_WORKERS, max_depth=MAX_WALK_DEPTH, file_roots=None):
+        self.workers = workers
+        self.max_depth = max_depth
+        self.file_roots = file_roots or {}
+        self._listings = {}
+        self._metadata = {}
+        self._lock = threading.Lock()
+
+    def listing(self, url):
+        """Returns (subdirectory URLs, {file name: file URL}) of a directory, fetching it on first use."""
+        with self._lock:
+            cached = self._listings.get(url)
+        if cached is not None:
+            _count("listings_reused")
+            return cached
+        # Errors other than a missing directory are raised, not remembered as an empty listing, so the crawl
+        # stage listing this subtree retries it (see CrawlEngine)
+        response = http_client.get(url)
+        if response.status_code in (404, 410):
+            listing = ([], {})
+        else:
+            response.raise_for_status()
+            listing = parse_listing(response.text, url)
+        _count("listings_fetched")
+        with self._lock:
+            self._listings.setdefault(url, listing)
+        return listing
+
+    def file_url(self, url, name):
+        """Returns the URL of a file in a directory: the listing's own link if it was fetched, else derived."""
+        with self._lock:
+            cached = self._listings.get(url)
+        if cached is not None and name in cached[1]:
+            return cached[1][name]
+        for listing_root, file_root in self.file_roots.items():
+            if url.startswith(listing_root):
+                url = file_root + url[len(listing_root):]
+                break
+        return urljoin(url, name)
+
+    def _read_metadata(self, url):
+        """
+        Returns (fetched, parsed metadata or None) for a directory's maven-metadata.xml, fetching it once.
+        - A missing file is remembered; other errors are raised and the next call tries again.
+        """
+        with self._lock:
+            cached = self._metadata.get(url)
+        if cached is not None:
+            return cached
+        _count("metadata_fetched")
+        response = http_client.get(self.file_url(url, METADATA_FILE))
+        if response.status_code == 200:
+            result = (True, parse_metadata(response.content))
+        elif response.status_code in (404, 410) or is_offline_miss(response):
+            result = (False, None)
+        else:
+            response.raise_for_status()
+            result = (False, None)
+        with self._lock:
+            self._metadata.setdefault(url, result)
+        return result
+
+    def metadata(self, url):
+        """Returns the parsed artifact metadata of a directory (see maven_metadata.parse_metadata), or None."""
+        return self._read_metadata(url)[1]
+
+    def classify(self, url):
+        """Returns GROUP, ARTIFACT or VERSION for a directory."""
+        fetched, metadata = self._read_metadata(url)
+        # Artifact metadata lists versions; SNAPSHOT version metadata only has <snapshotVersions>, group
+        # metadata (maven plugin groups) only <plugins>
+        if metadata is not None and (metadata["versions"] or metadata["release"] or metadata["latest"]):
+            return ARTIFACT
+        dirs, files = self.listing(url)
+        if any(name.endswith(".pom") for name in files):
+            return VERSION
+        if fetched:
+            return GROUP
+        # Directories without metadata (some Artifactory views): an artifact's subdirectories hold POMs
+        if dirs and any(name.endswith(".pom") for name in self.listing(dirs[0])[1]):
+            return ARTIFACT
+        return GROUP
+
+    def artifact_dirs(self, root):
+        """Returns the URL of every artifact directory at or below root."""
+        artifacts = []
+        frontier = [root]
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for depth in range(self.max_depth + 1):
+                if not frontier:
+                    break
+                next_frontier = []
+                for url, kind in zip(frontier, executor.map(self.classify, frontier)):
+                    if kind == ARTIFACT:
+                        artifacts.append(url)
+                    elif kind == GROUP:
+                        next_frontier.extend(self.listing(url)[0])
+                frontier = next_frontier
+            else:
+                if frontier:
+                    print(f"Max depth reached below {root}; skipped {len(frontier)} directories")
+        return artifacts
+
+
+def stats():
+    with _stats_lock:
+        return dict(_stats)
+
+
+def print_stats():
+    print(f"📂 Directory listings: {stats()}")
@@ -0,0 +1,455 @@
+import asyncio
+import functools
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from crawler_common.dead_letter import REPLAY_DEAD_LETTERS
+from crawler_common.frontier import LISTING, artifact_entry, listing_entry
+from crawler_common.negative_cache import FETCH_FAILURES, PERMANENT_FAILURES, UNRESOLVABLE, classify_exception
+from crawler_common.rate_control import CircuitOpen
+from crawler_common.retry import RETRY_ATTEMPTS, backoff_delay, is_transient
+
+# Stages an artifact moves through, in order
+STAGES = ("listing", "fetch", "resolve", "store")
+
+# Default number of concurrent workers per stage
+DEFAULT_WORKERS = {"listing": 8, "fetch": 32, "resolve": 1, "store": 4}
+
+# Maximum number of discovered artifacts waiting in the pipeline at once
+DEFAULT_MAX_IN_FLIGHT = 500
+
+# Seconds a batched resolve worker waits for its batch to fill up
+DEFAULT_BATCH_WINDOW = 2.0
+
+# Items taken from the frontier per lease
+LEASE_BATCH = 100
+
+# Seconds between looks at a shared frontier that is empty while other workers still hold items
+BUSY_POLL_INTERVAL = 10
+
+# Dependency hops expanded from an artifact found by listing (unset: no limit, 0: do not expand)
+MAX_EXPANSION_DEPTH = int(os.getenv("MAX_EXPANSION_DEPTH")) if os.getenv("MAX_EXPANSION_DEPTH") else None
+
+
+class CrawlJob:
+    """A single artifact moving through the pipeline."""
+
+    def __init__(self, group_id, artifact_id, version, holds_slot=False, hints=None, depth=0):
+        self.group_id = group_id
+        self.artifact_id = artifact_id
+        self.version = version
+        self.holds_slot = holds_slot
+        self.hints = hints  # keyword arguments for the fetch handler (e.g. size/timestamp from an index)
+        self.depth = depth  # dependency hops from an artifact found by listing
+        self.record = None
+        self.attempts = 0
+
+    @property
+    def dependency_id(self):
+        return f"{self.group_id}:{self.artifact_id}:{self.version}"
+
+    key = dependency_id
+
+    @property
+    def entry(self):
+        return artifact_entry(self.group_id, self.artifact_id, self.version, self.hints, self.depth)
+
+
+class ListingJob:
+    """A listing item (e.g. a group directory) waiting to be expanded into artifacts."""
+
+    def __init__(self, item, holds_slot=False):
+        self.item = item
+        self.holds_slot = holds_slot
+        self.attempts = 0
+
+    @property
+    def key(self):
+        return listing_entry(self.item)[0]
+
+    @property
+    def entry(self):
+        return listing_entry(self.item)
+
+
+class CrawlEngine:
+    """
+    Runs artifacts through listing → POM fetch → resolution → storage concurrently.
+    - Every stage has its own queue and a bounded number of workers.
+    - Stage callables may be plain functions (run on a thread pool) or coroutines.
+    - list_artifacts(item) yields (group_id, artifact_id, version) tuples.
+    - fetch_artifact(group_id, artifact_id, version) returns a record dict or None.
+    - resolve_artifact(record) returns the completed record or None.
+    - store_artifact(record) persists the record.
+    - expand(record), if given, yields coordinates discovered from a stored record; they are crawled up to
+      max_depth hops away from the listed artifacts.
+    - is_known(dependency_id), if given, skips coordinates that are already stored.
+    - is_resolved(record), if given, lets fetched records that need no resolution skip straight to storage.
+    - With a negative_cache (see negative_cache.NegativeCache), coordinates that failed recently are skipped
+      until their TTL expires. Timeouts and HTTP errors raised while fetching or resolving, and records
+      resolution gave up on, are recorded there; fetch failures of a stored coordinate are cleared.
+    - A job whose stage raises a transient error (see retry.is_transient) is retried in that stage up to
+      retries times, after a jittered exponential backoff; while its host's circuit is open it waits for the
+      circuit without using up attempts. Jobs that still fail go to dead_letters (see
+      dead_letter.DeadLetterQueue), from which run(replay=True) queues them again.
+    - With resolve_batch_size > 1, resolve_artifact receives a list of up to that many records
+      and returns a list of the same length (records or None).
+    - With a frontier (see frontier.Frontier), every item is queued there instead of in memory and leased
+      as pipeline slots free up, in the frontier's schedule order (e.g. most referenced artifacts first). An artifact is marked done once store_artifact returns, or, if it returns
+      a concurrent.futures.Future, once that Future succeeds (e.g. the write-behind store's acknowledgement).
+    """
+
+    def __init__(self, list_artifacts, fetch_artifact, resolve_artifact, store_artifact,
+                 expand=None, is_known=None, is_resolved=None, workers=None,
+                 max_in_flight=DEFAULT_MAX_IN_FLIGHT, resolve_batch_size=1, batch_window=DEFAULT_BATCH_WINDOW,
+                 frontier=None, max_depth=MAX_EXPANSION_DEPTH, negative_cache=None, dead_letters=None,
+                 retries=RETRY_ATTEMPTS):
+        self.handlers = {
+            "listing": list_artifacts,
+            "fetch": fetch_artifact,
+            "resolve": resolve_artifact,
+            "store": store_artifact,
+        }
+        self.expand = expand
+        self.is_known = is_known
+        self.is_resolved = is_resolved
+        self.workers = dict(DEFAULT_WORKERS)
+        self.workers.update(workers or {})
+        self.max_in_flight = max_in_flight
+        self.batch_sizes = {"resolve": resolve_batch_size}
+        self.batch_window = batch_window
+        self.frontier = frontier
+        self.max_depth = max_depth
+        self.negative_cache = negative_cache
+        self.dead_letters = dead_letters
+        self.retries = retries
+        self.seen = set()
+        self.stats = {stage: {"done": 0, "failed": 0, "retried": 0} for stage in STAGES}
+
+    async def _call(self, func, *args):
+        """Awaits coroutine handlers directly and runs blocking ones on the thread pool."""
+        if asyncio.iscoroutinefunction(func):
+            return await func(*args)
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    def _enqueue(self, stage, item):
+        self._pending += 1
+        self._idle.clear()
+        self._queues[stage].put_nowait(item)
+
+    def _forward(self, stage, job):
+        """Hands a job already counted as pending to the next stage."""
+        self._queues[stage].put_nowait(job)
+
+    def _finish(self, job):
+        if job.holds_slot:
+            self._slots.release()
+        self._pending -= 1
+        self._wakeup.set()
+        if self._pending == 0:
+            self._idle.set()
+
+    def _settle(self, stage, jobs, error=None):
+        """
+        Records the outcome of jobs leaving the pipeline (failed ones with their error) in the frontier,
+        the negative cache and the dead-letter queue. Blocking: runs on the thread pool.
+        - Stored artifacts are settled by _acknowledge once their write is, so they are left alone here.
+        """
+        for job in jobs:
+            if error is not None:
+                self._give_up(stage, job, error)
+                if self.frontier is not None:
+                    self.frontier.fail(job.key)
+                continue
+            if stage == "store":
+                continue
+            if self.dead_letters is not None:
+                self.dead_letters.remove(job.key)
+            if self.frontier is not None:
+                self.frontier.done(job.key)
+
+    def _settle_write(self, key, entry, error=None):
+        """Records a stored job once its write succeeded, or failed with error (then it is dead-lettered)."""
+        if error is None:
+            if self.dead_letters is not None:
+                self.dead_letters.remove(key)
+            if self.frontier is not None:
+                self.frontier.done(key)
+            return
+        if self.frontier is not None:
+            self.frontier.fail(key)
+        if self.dead_letters is not None:
+            self.dead_letters.add(entry, "store", error, 1)
+
+    async def _acknowledge(self, job, written):
+        """Settles a stored job once its write is acknowledged (see _settle_write)."""
+        if not isinstance(written, Future):
+            await self._call(self._settle_write, job.key, job.entry)
+            return
+        key, entry = job.key, job.entry
+        # Runs on the thread that resolves the Future (the write-behind store's), never before the write is done
+        written.add_done_callback(lambda future: self._settle_write(key, entry, future.exception()))
+
+    def _claim(self, group_id, artifact_id, version):
+        """Marks a coordinate as queued for this run; returns False if it already was."""
+        dependency_id = f"{group_id}:{artifact_id}:{version}"
+        if dependency_id in self.seen:
+            return False
+        self.seen.add(dependency_id)
+        return True
+
+    async def _handle_listing(self, job):
+        list_artifacts = self.handlers["listing"]
+        if asyncio.iscoroutinefunction(list_artifacts):
+            coordinates = await list_artifacts(job.item)
+        else:
+            # Drain generators on the worker thread so listing never blocks the event loop
+            coordinates = await self._call(lambda: list(list_artifacts(job.item) or []))
+        if self.frontier is not None:
+            await self._call(self.frontier.add, [artifact_entry(*coordinate) for coordinate in coordinates or []])
+            return False
+        for group_id, artifact_id, version in coordinates or []:
+            if not self._claim(group_id, artifact_id, version):
+                continue
+            await self._slots.acquire()
+            self._enqueue("fetch", CrawlJob(group_id, artifact_id, version, holds_slot=True))
+
+    async def _handle_fetch(self, job):
+        if self.is_known and await self._call(self.is_known, job.dependency_id):
+            print(f"🔍 Skipping (already processed): {job.dependency_id}")
+            return False
+        known_failure = await self._call(self.negative_cache.check, job.dependency_id) if self.negative_cache else None
+        if known_failure:
+            print(f"⏭ Skipping (failed recently, {known_failure[0]}: {known_failure[1]}): {job.dependency_id}")
+            return False
+        fetch_artifact = self.handlers["fetch"]
+        if job.hints:
+            fetch_artifact = functools.partial(fetch_artifact, **job.hints)
+        job.record = await self._call(fetch_artifact, job.group_id, job.artifact_id, job.version)
+        if job.record is None:
+            return False
+        if self.is_resolved and self.is_resolved(job.record):
+            self._forward("store", job)
+        else:
+            self._forward("resolve", job)
+        return True
+
+    async def _unresolvable(self, jobs):
+        if self.negative_cache is not None and jobs:
+            await self._call(self._record_unresolvable, jobs)
+
+    def _record_unresolvable(self, jobs):
+        for job in jobs:
+            self.negative_cache.record(job.dependency_id, UNRESOLVABLE, "resolution failed")
+
+    async def _handle_resolve(self, job):
+        job.record = await self._call(self.handlers["resolve"], job.record)
+        if job.record is None:
+            await self._unresolvable([job])
+            return False
+        self._forward("store", job)
+        return True
+
+    async def _handle_resolve_batch(self, jobs):
+        records = await self._call(self.handlers["resolve"], [job.record for job in jobs])
+        forwarded = []
+        for job, record in zip(jobs, records):
+            job.record = record
+            if record is not None:
+                self._forward("store", job)
+            forwarded.append(record is not None)
+        await self._unresolvable([job for job in jobs if job.record is None])
+        return forwarded
+
+    async def _handle_store(self, job):
+        written = await self._call(self.handlers["store"], job.record)
+        if self.negative_cache is not None:
+            # Resolution failures only expire: the Google crawler stores artifacts Gradle could not resolve
+            await self._call(self.negative_cache.clear, job.dependency_id, FETCH_FAILURES)
+        expand = self.expand and (self.max_depth is None or job.depth < self.max_depth)
+        dependencies = list(self.expand(job.record) or []) if expand else []
+        if self.frontier is not None:
+            entries = [artifact_entry(*dependency, depth=job.depth + 1) for dependency in dependencies]
+            await self._call(self.frontier.add, entries, True)
+            await self._acknowledge(job, written)
+            return False
+        await self._acknowledge(job, written)
+        for group_id, artifact_id, version in dependencies:
+            if self._claim(group_id, artifact_id, version):
+                print(f"🔍 Processing direct dependency: {group_id}:{artifact_id}:{version}")
+                self._enqueue("fetch", CrawlJob(group_id, artifact_id, version, depth=job.depth + 1))
+        return False
+
+    async def _next_batch(self, queue, size):
+        """Takes one item, then whatever else arrives within batch_window, up to size items."""
+        items = [await queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.batch_window
+        while len(items) < size:
+            if not queue.empty():
+                items.append(queue.get_nowait())
+                continue
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                break
+            await asyncio.sleep(min(remaining, 0.05))
+        return items
+
+    async def _worker(self, stage):
+        handle = getattr(self, f"_handle_{stage}")
+        queue = self._queues[stage]
+        batch_size = self.batch_sizes.get(stage, 1)
+        while True:
+            if batch_size > 1:
+                items = await self._next_batch(queue, batch_size)
+            else:
+                items = [await queue.get()]
+            forwarded = [False] * len(items)
+            failed = None  # stays None when the worker is cancelled; the frontier then re-queues on restart
+            error = None
+            try:
+                if batch_size > 1:
+                    forwarded = await self._handle_resolve_batch(items)
+                else:
+                    forwarded = [await handle(items[0])]
+                self.stats[stage]["done"] += len(items)
+                failed = False
+            except Exception as e:
+                failed = True
+                error = e
+                labels = ", ".join(str(item.key) for item in items)
+                print(f"⚠ {stage} failed for {labels}: {e}")
+            finally:
+                settled = []
+                for item, was_forwarded in zip(items, forwarded):
+                    queue.task_done()
+                    if was_forwarded or (failed and self._retry(stage, item, error)):
+                        continue
+                    if failed:
+                        self.stats[stage]["failed"] += 1
+                    settled.append(item)
+                try:
+                    if settled and failed is not None:
+                        await self._call(self._settle, stage, settled, error)
+                finally:
+                    for item in settled:
+                        self._finish(item)
+
+    def _retry(self, stage, job, error):
+        """Schedules a failed job to run through its stage again; returns False once it is out of retries."""
+        if not is_transient(error):
+            return False
+        # Waiting for an open circuit is the host's fault, not the job's
+        if not isinstance(error, CircuitOpen):
+            if job.attempts >= self.retries:
+                return False
+            job.attempts += 1
+        delay = backoff_delay(max(job.attempts - 1, 0), error)
+        self.stats[stage]["retried"] += 1
+        print(f"↻ Retrying {stage} for {job.key} in {delay:.1f}s (attempt {job.attempts}/{self.retries})")
+        asyncio.get_running_loop().call_later(delay, self._forward, stage, job)
+        return True
+
+    def _give_up(self, stage, job, error):
+        """
+        Records a job that failed for good: negative cache (for fetch failures) and dead letters (unless the
+        failure is permanent, e.g. a 403, which a replay would only repeat).
+        """
+        failure = classify_exception(error)
+        if self.negative_cache is not None and failure is not None and isinstance(job, CrawlJob):
+            self.negative_cache.record(job.dependency_id, failure, error)
+        if self.dead_letters is not None and failure not in PERMANENT_FAILURES:
+            self.dead_letters.add(job.entry, stage, error, job.attempts + 1)
+
+    async def _feed(self):
+        """Leases frontier items into the pipeline whenever a slot is free; returns once nothing is left."""
+        leased = deque()
+        while True:
+            await self._slots.acquire()
+            if not leased:
+                self._wakeup.clear()
+                # Every job fed from the frontier holds a slot; never lease more than can start now, so
+                # workers sharing a frontier do not hoard items
+                limit = max(min(LEASE_BATCH, self.max_in_flight - self._pending), 1)
+                leased.extend(await self._call(self.frontier.lease, limit))
+            if not leased:
+                self._slots.release()
+                if self._pending == 0:
+                    # Other workers sharing the frontier may still queue items, or die and leave theirs behind
+                    if not await self._call(self.frontier.busy):
+                        return
+                    await asyncio.sleep(BUSY_POLL_INTERVAL)
+                    continue
+                # Running jobs may still queue new items; look again once one of them finishes
+                await self._wakeup.wait()
+                continue
+            key, kind, payload, depth = leased.popleft()
+            if kind == LISTING:
+                self._enqueue("listing", ListingJob(payload, holds_slot=True))
+            else:
+                group_id, artifact_id, version, hints = payload
+                self._enqueue("fetch", CrawlJob(group_id, artifact_id, version, holds_slot=True, hints=hints, depth=depth))
+
+    def _replayed(self):
+        """Returns the dead letters to queue again, clearing their negative cache entries."""
+        replayed = self.dead_letters.entries()
+        if replayed:
+            print(f"↻ Replaying {len(replayed)} dead letters")
+            if self.negative_cache is not None:
+                # A replay is asked for explicitly, so it does not wait for the failures' TTLs
+                for key, *_ in replayed:
+                    self.negative_cache.clear(key)
+        return replayed
+
+    async def run(self, listing_items=(), artifacts=(), replay=REPLAY_DEAD_LETTERS):
+        """
+        Crawls until every queued item has been stored or dropped.
+        - listing_items are passed to list_artifacts (e.g. group directories).
+        - artifacts are (group_id, artifact_id, version) tuples fed straight to the fetch stage; an optional
+          fourth element is a dict of keyword arguments passed on to fetch_artifact.
+        - With replay, the items in dead_letters are queued again as well (and leave it once they succeed).
+        - With a frontier, both are added to it and the crawl continues with whatever it still has pending.
+        """
+        loop = asyncio.get_running_loop()
+        executor = ThreadPoolExecutor(max_workers=sum(self.workers.values()))
+        loop.set_default_executor(executor)
+        replayed = await self._call(self._replayed) if replay and self.dead_letters is not None else []
+
+        self._queues = {stage: asyncio.Queue() for stage in STAGES}
+        self._slots = asyncio.Semaphore(self.max_in_flight)
+        self._idle = asyncio.Event()
+        self._wakeup = asyncio.Event()
+        self._pending = 0
+
+        tasks = [
+            asyncio.create_task(self._worker(stage))
+            for stage in STAGES
+            for _ in range(self.workers[stage])
+        ]
+        try:
+            if self.frontier is not None:
+                # Items already in the frontier are not queued again; finished ones stay finished
+                await self._call(self.frontier.add, [listing_entry(item) for item in listing_items])
+                await self._call(self.frontier.add, (artifact_entry(*artifact) for artifact in artifacts))
+                # Replayed items were settled already, so they are put back in the queue whatever their state
+                await self._call(self.frontier.requeue, replayed)
+                await self._feed()
+                return
+            for item in listing_items:
+                self._enqueue("listing", ListingJob(item))
+            for group_id, artifact_id, version, *hints in artifacts:
+                if self._claim(group_id, artifact_id, version):
+                    self._enqueue("fetch", CrawlJob(group_id, artifact_id, version, hints=hints[0] if hints else None))
+            for _, kind, payload, _, depth in replayed:
+                if kind == LISTING:
+                    self._enqueue("listing", ListingJob(payload))
+                elif self._claim(*payload[:3]):
+                    self._enqueue("fetch", CrawlJob(*payload[:3], hints=payload[3], depth=depth))
+            if self._pending:
+                await self._idle.wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            executor.shutdown(wait=False)
+            print(f"📊 Crawl stats: {self.stats}")
@@ -0,0 +1,60 @@
+import gzip
+import json
+import os
+import tempfile
+
+# Documents fetched per cursor round trip; only one batch is held in memory at a time
+EXPORT_BATCH_SIZE = 1000
+
+# "json" (an indented array, same layout as json.dump(..., indent=2)), "ndjson" (one document per line),
+# optionally gzip-compressed with a ".gz" suffix
+FORMATS = ("json", "ndjson", "json.gz", "ndjson.gz")
+EXPORT_FORMAT = os.getenv("EXPORT_FORMAT", "json")
+
+
+def export_path(path, fmt=EXPORT_FORMAT):
+    """Returns the file name for a format: "deps.json" becomes "deps.ndjson.gz" for "ndjson.gz"."""
+    base = path[:-len(".json")] if path.endswith(".json") else path
+    return f"{base}.{fmt}"
+
+
+def _write_documents(out, documents, fmt):
+    count = 0
+    if fmt.startswith("ndjson"):
+        for document in documents:
+            out.write(json.dumps(document))
+            out.write("\n")
+            count += 1
+        return count
+    for document in documents:
+        out.write("[\n  " if count == 0 else ",\n  ")
+        # JSON strings never contain raw newlines, so re-indenting the lines is safe
+        out.write(json.dumps(document, indent=2).replace("\n", "\n  "))
+        count += 1
+    out.write("\n]" if count else "[]")
+    return count
+
+
+def export_collection(collection, path, fmt=EXPORT_FORMAT, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Streams every document of a collection to a file and returns (path written, document count).
+    - The cursor is read in batches and each document is written as soon as it arrives, so memory use
+      does not grow with the collection.
+    - Output goes to a temporary file next to the target that replaces it only once complete; an
+      interrupted export leaves the previous file untouched.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"unknown export format {fmt!r}, expected one of {FORMATS}")
+    path = export_path(path, fmt)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    os.close(fd)
+    try:
+        opener = gzip.open if fmt.endswith(".gz") else open
+        with opener(tmp_path, "wt", encoding="utf-8") as out:
+            count = _write_documents(out, collection.find({}, batch_size=batch_size), fmt)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return path, count
@@ -0,0 +1,359 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from pymongo import ASCENDING, DESCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from crawler_common.gav_cache import DEFAULT_CACHE_DIR
+from crawler_common.storage import DUPLICATE_KEY
+
+# "sqlite" keeps one local frontier per crawler; "mongodb" shares it through the crawler's database on MONGO_URI,
+# so any number of workers on any number of hosts split one crawl between them
+FRONTIER_STORE = os.getenv("FRONTIER_STORE", "sqlite")
+
+# One database per crawler; empty keeps the frontier in memory (no resume after a restart)
+FRONTIER_DIR = os.getenv("FRONTIER_DIR", os.path.join(DEFAULT_CACHE_DIR, "frontier") if DEFAULT_CACHE_DIR else "")
+
+# Name of this worker in the shared frontier
+WORKER_ID = os.getenv("CRAWL_WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+
+# A shared lease expires this many seconds after its last heartbeat; another worker then takes the item over
+LEASE_SECONDS = 300
+HEARTBEAT_INTERVAL = 60
+
+# Entries upserted into the shared frontier per bulk_write
+ADD_BATCH = 1000
+
+# Items marked done or failed reach the shared frontier in one update_many per state, at most this many
+# seconds later (or as soon as MARK_BATCH of them are waiting)
+MARK_FLUSH_INTERVAL = 1.0
+MARK_BATCH = 1000
+
+# Order in which pending artifacts are leased: "popularity" (most referenced by stored artifacts first),
+# "depth" (fewest dependency hops from a listed artifact first) or "fifo" (discovery order)
+CRAWL_SCHEDULE = os.getenv("CRAWL_SCHEDULE", "popularity")
+SCHEDULES = {
+    "popularity": [("priority", ASCENDING), ("refs", DESCENDING), ("seq", ASCENDING)],
+    "depth": [("priority", ASCENDING), ("depth", ASCENDING), ("seq", ASCENDING)],
+    "fifo": [("priority", ASCENDING), ("seq", ASCENDING)],
+}
+
+# Items that raised are retried on later runs until they have failed this many times
+MAX_ATTEMPTS = 3
+
+PENDING, LEASED, DONE, FAILED = 0, 1, 2, 3
+
+# Lower priorities are leased first: artifacts already discovered go before directories still to be listed,
+# so stored results keep coming while the tree is walked
+ARTIFACT_PRIORITY = 0
+LISTING_PRIORITY = 1
+
+LISTING, ARTIFACT = "listing", "artifact"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    state INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    depth INTEGER NOT NULL DEFAULT 0,
+    refs INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+
+def listing_entry(item):
+    return f"{LISTING}:{item}", LISTING, item, LISTING_PRIORITY, 0
+
+
+def artifact_entry(group_id, artifact_id, version, hints=None, depth=0):
+    """Entry of an artifact; depth counts the dependency hops from an artifact found by listing."""
+    key = f"{group_id}:{artifact_id}:{version}"
+    return key, ARTIFACT, [group_id, artifact_id, version, hints], ARTIFACT_PRIORITY, depth
+
+
+def _schedule(schedule):
+    if schedule not in SCHEDULES:
+        raise ValueError(f"unknown crawl schedule {schedule!r}, expected one of {tuple(SCHEDULES)}")
+    return SCHEDULES[schedule]
+
+
+def frontier_path(name):
+    """Returns the database path of a crawler's frontier, or ":memory:" when FRONTIER_DIR is empty."""
+    if not FRONTIER_DIR:
+        return ":memory:"
+    os.makedirs(FRONTIER_DIR, exist_ok=True)
+    return os.path.join(FRONTIER_DIR, f"{name}.sqlite")
+
+
+class Frontier:
+    """
+    Persistent, de-duplicated work queue of a crawl (listing items and artifacts) in SQLite.
+    - Every key is queued once for the lifetime of the database: items already done are never leased again,
+      so a restarted crawl picks up exactly where the last one stopped.
+    - lease() hands out pending items and marks them in progress; done() or fail() settles them. Leases left
+      behind by an interrupted run are returned to the queue when the frontier is opened again.
+    - Pending items live on disk; the crawl only holds the few it has leased in memory.
+    - Pending artifacts are leased in the order of schedule (see SCHEDULES); every time a stored artifact
+      references a queued one (add(..., referenced=True)), the queued one gains popularity.
+    """
+
+    def __init__(self, path, max_attempts=MAX_ATTEMPTS, schedule=CRAWL_SCHEDULE):
+        self.path = path
+        self.max_attempts = max_attempts
+        order = _schedule(schedule)
+        self._order = ", ".join(f"{column} DESC" if direction == DESCENDING else column for column, direction in order)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(SCHEMA)
+            self._db.execute(
+                f"CREATE INDEX IF NOT EXISTS items_{schedule} ON items (state, {self._order})")
+            resumed = self._db.execute(
+                "UPDATE items SET state = ? WHERE state = ? OR (state = ? AND attempts < ?)",
+                (PENDING, LEASED, FAILED, max_attempts)).rowcount
+        if resumed:
+            print(f"🧭 Resuming {resumed} interrupted or failed items from {path}")
+
+    def add(self, entries, referenced=False):
+        """
+        Queues (key, kind, payload, priority, depth) entries whose key was never seen.
+        - Known keys keep their state; their depth is lowered if the new path is shorter, and with referenced
+          (dependencies of a stored artifact) their reference count goes up by one.
+        """
+        on_conflict = "refs = refs + 1, depth = MIN(depth, excluded.depth)" if referenced else "depth = MIN(depth, excluded.depth)"
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT INTO items (key, kind, payload, priority, depth, refs) VALUES (?, ?, ?, ?, ?, ?) "
+                f"ON CONFLICT (key) DO UPDATE SET {on_conflict}",
+                ((key, kind, json.dumps(payload), priority, depth, int(referenced))
+                 for key, kind, payload, priority, depth in entries))
+
+    def requeue(self, entries):
+        """Queues (key, kind, payload, priority, depth) entries again whatever their state, failures forgotten."""
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT INTO items (key, kind, payload, priority, depth) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET state = ?, attempts = 0",
+                ((key, kind, json.dumps(payload), priority, depth, PENDING)
+                 for key, kind, payload, priority, depth in entries))
+
+    def lease(self, limit):
+        """Marks up to limit pending items in progress, in schedule order; returns (key, kind, payload, depth)."""
+        with self._lock, self._db:
+            rows = self._db.execute(
+                f"SELECT seq, key, kind, payload, depth FROM items WHERE state = ? ORDER BY {self._order} LIMIT ?",
+                (PENDING, limit)).fetchall()
+            self._db.executemany("UPDATE items SET state = ? WHERE seq = ?", [(LEASED, row[0]) for row in rows])
+        return [(key, kind, json.loads(payload), depth) for _, key, kind, payload, depth in rows]
+
+    def done(self, key):
+        with self._lock, self._db:
+            self._db.execute("UPDATE items SET state = ? WHERE key = ?", (DONE, key))
+
+    def fail(self, key):
+        """Marks an item failed; it is retried on the next run while it has fewer than max_attempts failures."""
+        with self._lock, self._db:
+            self._db.execute("UPDATE items SET state = ?, attempts = attempts + 1 WHERE key = ?", (FAILED, key))
+
+    def busy(self):
+        """Whether other workers still hold items that may queue more work (never, for a local frontier)."""
+        return False
+
+    def counts(self):
+        with self._lock:
+            rows = self._db.execute("SELECT state, COUNT(*) FROM items GROUP BY state").fetchall()
+        return _named_counts(rows)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def _named_counts(rows):
+    names = {PENDING: "pending", LEASED: "in_progress", DONE: "done", FAILED: "failed"}
+    counts = {name: 0 for name in names.values()}
+    counts.update({names[state]: count for state, count in rows})
+    return counts
+
+
+class MongoFrontier:
+    """
+    Frontier shared by several workers through a MongoDB collection (same interface as Frontier).
+    - Items are leased one at a time with find_one_and_update, so two workers never get the same item.
+    - A lease carries its owner and an expiry; a heartbeat thread keeps extending the leases of this worker.
+      Items of a worker that died are leased again by the others once the expiry has passed.
+    - Failed items with attempts left are queued again whenever a worker starts, as with the local frontier.
+    - done() and fail() only collect keys; a background thread writes them in batches, so callers (such as
+      the write-behind store's acknowledgements) never wait for MongoDB.
+    """
+
+    def __init__(self, collection, worker_id=WORKER_ID, lease_seconds=LEASE_SECONDS,
+                 heartbeat_interval=HEARTBEAT_INTERVAL, max_attempts=MAX_ATTEMPTS, schedule=CRAWL_SCHEDULE):
+        self.collection = collection
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.heartbeat_interval = heartbeat_interval
+        self.max_attempts = max_attempts
+        self.path = f"{collection.database.name}.{collection.name}"
+        self._order = _schedule(schedule)
+        collection.create_index([("state", ASCENDING)] + self._order)
+        collection.create_index([("owner", ASCENDING), ("state", ASCENDING)])
+        retried = collection.update_many(
+            {"state": FAILED, "attempts": {"$lt": max_attempts}}, {"$set": {"state": PENDING}}).modified_count
+        if retried:
+            print(f"🧭 Retrying {retried} failed items from {self.path}")
+        self._stop = threading.Event()
+        self._heartbeat = threading.Thread(target=self._renew_leases, name="frontier-heartbeat", daemon=True)
+        self._heartbeat.start()
+        self._marks = {DONE: [], FAILED: []}
+        self._marks_cond = threading.Condition()
+        self._marker = threading.Thread(target=self._write_marks, name="frontier-marks", daemon=True)
+        self._marker.start()
+
+    def _renew_leases(self):
+        while not self._stop.wait(self.heartbeat_interval):
+            try:
+                self.collection.update_many(
+                    {"owner": self.worker_id, "state": LEASED},
+                    {"$set": {"lease_until": time.time() + self.lease_seconds}})
+            except PyMongoError as e:
+                print(f"⚠ Could not renew the leases of {self.worker_id}: {e}")
+
+    def _write_marks(self):
+        while not self._stop.is_set():
+            with self._marks_cond:
+                if sum(len(keys) for keys in self._marks.values()) < MARK_BATCH:
+                    self._marks_cond.wait(MARK_FLUSH_INTERVAL)
+            self._flush_marks()
+
+    def _flush_marks(self):
+        """Writes the collected done/failed keys with one update_many per state; kept for later if that fails."""
+        with self._marks_cond:
+            marks, self._marks = self._marks, {DONE: [], FAILED: []}
+        updates = {
+            DONE: {"$set": {"state": DONE}, "$unset": {"owner": "", "lease_until": ""}},
+            FAILED: {"$set": {"state": FAILED}, "$inc": {"attempts": 1}, "$unset": {"owner": "", "lease_until": ""}},
+        }
+        for state, keys in marks.items():
+            if not keys:
+                continue
+            try:
+                self.collection.update_many({"_id": {"$in": keys}}, updates[state])
+            except PyMongoError as e:
+                print(f"⚠ Could not mark {len(keys)} frontier items: {e}")
+                with self._marks_cond:
+                    self._marks[state].extend(keys)
+
+    def _mark(self, state, key):
+        with self._marks_cond:
+            self._marks[state].append(key)
+            if sum(len(keys) for keys in self._marks.values()) >= MARK_BATCH:
+                self._marks_cond.notify()
+
+    def _upsert(self, operations):
+        try:
+            self.collection.bulk_write(operations, ordered=False)
+        except BulkWriteError as e:
+            # Another worker inserting the same key at the same moment is fine; anything else is not
+            if any(error.get("code") != DUPLICATE_KEY for error in e.details.get("writeErrors", [])):
+                raise
+
+    def add(self, entries, referenced=False):
+        """Queues (key, kind, payload, priority, depth) entries whose key was never seen (see Frontier.add)."""
+        operations = []
+        for key, kind, payload, priority, depth in entries:
+            update = {
+                "$setOnInsert": {
+                    "kind": kind, "payload": payload, "priority": priority,
+                    "state": PENDING, "attempts": 0, "seq": time.time(),
+                },
+                "$min": {"depth": depth},
+                "$inc": {"refs": 1 if referenced else 0},
+            }
+            operations.append(UpdateOne({"_id": key}, update, upsert=True))
+            if len(operations) >= ADD_BATCH:
+                self._upsert(operations)
+                operations = []
+        if operations:
+            self._upsert(operations)
+
+    def requeue(self, entries):
+        """Queues entries again whatever their state, failures forgotten (see Frontier.requeue)."""
+        operations = []
+        for key, kind, payload, priority, depth in entries:
+            update = {
+                "$set": {"state": PENDING, "attempts": 0},
+                "$unset": {"owner": "", "lease_until": ""},
+                "$setOnInsert": {"kind": kind, "payload": payload, "priority": priority, "seq": time.time(),
+                                 "depth": depth, "refs": 0},
+            }
+            operations.append(UpdateOne({"_id": key}, update, upsert=True))
+            if len(operations) >= ADD_BATCH:
+                self._upsert(operations)
+                operations = []
+        if operations:
+            self._upsert(operations)
+
+    def lease(self, limit):
+        """Claims up to limit pending (or abandoned) items for this worker; returns (key, kind, payload, depth)."""
+        leased = []
+        while len(leased) < limit:
+            now = time.time()
+            document = self.collection.find_one_and_update(
+                {"$or": [{"state": PENDING}, {"state": LEASED, "lease_until": {"$lt": now}}]},
+                {"$set": {"state": LEASED, "owner": self.worker_id, "lease_until": now + self.lease_seconds}},
+                sort=self._order,
+                projection={"kind": 1, "payload": 1, "depth": 1},
+                return_document=ReturnDocument.AFTER,
+            )
+            if document is None:
+                break
+            leased.append((document["_id"], document["kind"], document["payload"], document.get("depth", 0)))
+        return leased
+
+    def done(self, key):
+        self._mark(DONE, key)
+
+    def fail(self, key):
+        """Marks an item failed; it is retried when a worker starts while it has fewer than max_attempts failures."""
+        self._mark(FAILED, key)
+
+    def busy(self):
+        """Whether other workers still hold leases (their items may queue more work or be abandoned)."""
+        return self.collection.count_documents(
+            {"state": LEASED, "owner": {"$ne": self.worker_id}}, limit=1) > 0
+
+    def counts(self):
+        self._flush_marks()
+        rows = self.collection.aggregate([{"$group": {"_id": "$state", "count": {"$sum": 1}}}])
+        return _named_counts((row["_id"], row["count"]) for row in rows)
+
+    def close(self):
+        """Stops the heartbeat and hands the items this worker still holds back to the queue."""
+        self._stop.set()
+        with self._marks_cond:
+            self._marks_cond.notify()
+        self._marker.join()
+        self._heartbeat.join()
+        # Items marked done or failed must be written before the rest is handed back
+        self._flush_marks()
+        self.collection.update_many(
+            {"owner": self.worker_id, "state": LEASED},
+            {"$set": {"state": PENDING}, "$unset": {"owner": "", "lease_until": ""}})
+
+
+def open_frontier(name, db):
+    """Returns the frontier of a crawler: local SQLite, or shared in db when FRONTIER_STORE=mongodb."""
+    if FRONTIER_STORE == "mongodb":
+        return MongoFrontier(db.crawl_frontier)
+    return Frontier(frontier_path(name))
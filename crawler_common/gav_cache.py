@@ -0,0 +1,88 @@
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from urllib.parse import quote
+
+# Number of entries a cache keeps in memory before evicting the least recently used
+DEFAULT_MEMORY_SIZE = 4096
+
+# Directory shared by all crawlers for the persistent tier (set POM_CACHE_DIR="" to keep caches in memory only)
+DEFAULT_CACHE_DIR = os.getenv(
+    "POM_CACHE_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".crawler_cache"))
+
+
+def _is_snapshot(version):
+    return version is not None and version.endswith("SNAPSHOT")
+
+
+class GavCache:
+    """
+    Process-wide cache of JSON-serialisable values keyed by (group, artifact, version).
+    - Memory tier: LRU bounded by memory_size.
+    - Disk tier: one JSON file per GAV under directory/name, read back after eviction or in a later run.
+      Release coordinates are immutable, so entries never expire; SNAPSHOTs stay in memory only.
+    """
+
+    def __init__(self, name, memory_size=DEFAULT_MEMORY_SIZE, directory=DEFAULT_CACHE_DIR):
+        self.name = name
+        self.memory_size = memory_size
+        self.directory = os.path.join(directory, name) if directory else None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, gav):
+        return os.path.join(self.directory, *(quote(part or "_", safe="") for part in gav)) + ".json"
+
+    def _remember(self, gav, value):
+        with self._lock:
+            self._entries[gav] = value
+            self._entries.move_to_end(gav)
+            while len(self._entries) > self.memory_size:
+                self._entries.popitem(last=False)
+
+    def get(self, gav):
+        """Returns the cached value for a GAV, or None."""
+        gav = tuple(gav)
+        with self._lock:
+            value = self._entries.get(gav)
+            if value is not None:
+                self._entries.move_to_end(gav)
+                self.hits += 1
+                return value
+        if self.directory and not _is_snapshot(gav[2]):
+            try:
+                with open(self._path(gav), encoding="utf-8") as file:
+                    value = json.load(file, object_pairs_hook=OrderedDict)
+            except (OSError, ValueError):
+                value = None
+            if value is not None:
+                self.disk_hits += 1
+                self._remember(gav, value)
+                return value
+        self.misses += 1
+        return None
+
+    def put(self, gav, value, persist=True):
+        """Caches a value; persist=False keeps it out of the disk tier (e.g. results of failed fetches)."""
+        gav = tuple(gav)
+        self._remember(gav, value)
+        if not (persist and self.directory) or _is_snapshot(gav[2]):
+            return
+        path = self._path(gav)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so concurrent crawlers never read a half-written entry
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump(value, file)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠ Could not write {self.name} cache entry {':'.join(str(part) for part in gav)}: {e}")
+
+    def stats(self):
+        return {"entries": len(self._entries), "hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses}
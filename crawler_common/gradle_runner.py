@@ -0,0 +1,184 @@
+import asyncio
+import os
+import shutil
+import subprocess
+import tempfile
+
+# Files of the template Android project copied into every worker directory
+PROJECT_FILES = ("build.gradle", "settings.gradle", "gradle.properties", "local.properties",
+                 "gradlew", "gradlew.bat", "gradle")
+
+# Read by build.gradle: one group:artifact:version per line, each gets its own crawl<index> configuration
+TARGETS_FILE = "crawl-targets.txt"
+
+# Gradle timeout for a batch: configuration of the Android project plus a share per artifact
+BATCH_TIMEOUT_BASE = 120
+BATCH_TIMEOUT_PER_ARTIFACT = 10
+
+# Pre-warming runs configuration once, which can include downloading Gradle and the Android plugin
+WARMUP_TIMEOUT = 600
+
+DEFAULT_POOL_SIZE = 2
+
+# The configuration cache would be invalidated by every new targets file anyway
+GRADLE_ARGS = ("--no-configuration-cache", "--console=plain", "-q")
+
+
+def gradlew(project_dir):
+    return os.path.join(project_dir, "gradlew.bat" if os.name == "nt" else "gradlew")
+
+
+def write_targets(project_dir, coordinates):
+    with open(os.path.join(project_dir, TARGETS_FILE), "w") as file:
+        for group_id, artifact_id, version in coordinates:
+            file.write(f"{group_id}:{artifact_id}:{version}\n")
+
+
+def parse_crawl_line(line, results):
+    """
+    Applies one line printed by the crawlDependencies task to {index: dependency list or None}.
+    - CRAWL-DEP <index> <group:artifact:version>, CRAWL-OK <index>, CRAWL-FAILED <index> <reason>
+    """
+    parts = line.strip().split(" ", 2)
+    if len(parts) < 2 or not parts[0].startswith("CRAWL-") or not parts[1].isdigit():
+        return
+    marker, index = parts[0], int(parts[1])
+    if marker == "CRAWL-DEP" and len(parts) == 3:
+        results.setdefault(index, []).append(parts[2])
+    elif marker == "CRAWL-OK":
+        results.setdefault(index, [])
+    elif marker == "CRAWL-FAILED":
+        results[index] = None
+
+
+async def _run_gradle(project_dir, args, timeout, on_line=None):
+    """Runs gradlew in project_dir, feeding stdout lines to on_line as they arrive; returns the exit code or None."""
+    try:
+        process = await asyncio.create_subprocess_exec(
+            gradlew(project_dir), *args, *GRADLE_ARGS,
+            cwd=project_dir,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+    except Exception as e:
+        print(f"⚠ Error running gradle: {e}")
+        return None
+
+    async def read_stdout():
+        async for raw in process.stdout:
+            if on_line:
+                on_line(raw.decode("utf-8", errors="replace"))
+        return await process.wait()
+
+    try:
+        return await asyncio.wait_for(read_stdout(), timeout)
+    except asyncio.TimeoutError:
+        print(f"⚠ Gradle timed out after {timeout}s in {project_dir}")
+        process.kill()
+        await process.wait()
+        return None
+    except asyncio.CancelledError:
+        process.kill()
+        await process.wait()
+        raise
+
+
+async def run_batch(coordinates, project_dir):
+    """
+    Runs the crawlDependencies task for the given artifacts in project_dir.
+    Returns a list of direct dependency lists (or None per failed artifact) in input order,
+    or None if the build itself failed or timed out.
+    """
+    write_targets(project_dir, coordinates)
+    results = {}
+    timeout = BATCH_TIMEOUT_BASE + BATCH_TIMEOUT_PER_ARTIFACT * len(coordinates)
+    returncode = await _run_gradle(project_dir, ("crawlDependencies",), timeout,
+                                   lambda line: parse_crawl_line(line, results))
+    if returncode != 0:
+        return None
+    # An artifact the task never reported on did not make it through the build
+    return [results.get(index) for index in range(len(coordinates))]
+
+
+async def resolve_batch(coordinates, project_dir):
+    """
+    Resolves direct dependencies for many artifacts with as few Gradle builds as possible.
+    - A failing build is bisected until the failing artifacts are isolated; those get None.
+    """
+    if not coordinates:
+        return []
+    results = await run_batch(coordinates, project_dir)
+    if results is not None:
+        return results
+    if len(coordinates) == 1:
+        group_id, artifact_id, version = coordinates[0]
+        print(f"⚠ Gradle dependency resolution failed for {group_id}:{artifact_id}:{version}")
+        return [None]
+    middle = len(coordinates) // 2
+    return (await resolve_batch(coordinates[:middle], project_dir)
+            + await resolve_batch(coordinates[middle:], project_dir))
+
+
+class GradleWorkerPool:
+    """
+    Keeps warm Gradle daemons for dependency resolution, one copy of the template project per worker.
+    - Every copy is configured once up front (`gradlew help`), so each worker owns an idle daemon
+      with the Android plugin already loaded when its first batch arrives.
+    - A batch resolves every artifact in its own configuration within a single build and the
+      results are read from stdout as the build prints them.
+    - close() stops the daemons and removes the worker directories.
+    """
+
+    def __init__(self, template_dir, size=None):
+        self.template_dir = template_dir
+        self.size = size or DEFAULT_POOL_SIZE
+        self.project_dirs = []
+        for index in range(self.size):
+            project_dir = tempfile.mkdtemp(prefix=f"gradle-worker-{index}-")
+            for name in PROJECT_FILES:
+                source = os.path.join(template_dir, name)
+                if os.path.isdir(source):
+                    shutil.copytree(source, os.path.join(project_dir, name))
+                elif os.path.exists(source):
+                    shutil.copy2(source, project_dir)
+            self.project_dirs.append(project_dir)
+        self._free = None
+        self._loop = None
+
+    async def _warm_up(self, project_dir):
+        returncode = await _run_gradle(project_dir, ("help",), WARMUP_TIMEOUT)
+        if returncode != 0:
+            print(f"⚠ Gradle warm-up failed in {project_dir}")
+
+    async def _free_dirs(self):
+        """Queue of idle worker directories, rebuilt (and the daemons warmed) when used from a new event loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._free = asyncio.Queue()
+            for project_dir in self.project_dirs:
+                write_targets(project_dir, [])
+            await asyncio.gather(*(self._warm_up(project_dir) for project_dir in self.project_dirs))
+            for project_dir in self.project_dirs:
+                self._free.put_nowait(project_dir)
+        return self._free
+
+    async def resolve(self, coordinates):
+        """Resolves a batch on the next idle worker; returns one direct dependency list (or None) per coordinate."""
+        free = await self._free_dirs()
+        project_dir = await free.get()
+        try:
+            return await resolve_batch(coordinates, project_dir)
+        finally:
+            free.put_nowait(project_dir)
+
+    def close(self):
+        if self.project_dirs:
+            # Daemons are shared per Gradle version and user home, so stopping them once is enough
+            try:
+                subprocess.run([gradlew(self.project_dirs[0]), "--stop"], cwd=self.project_dirs[0],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=WARMUP_TIMEOUT)
+            except (OSError, subprocess.TimeoutExpired) as e:
+                print(f"⚠ Could not stop Gradle daemons: {e}")
+        for project_dir in self.project_dirs:
+            shutil.rmtree(project_dir, ignore_errors=True)
@@ -0,0 +1,251 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from urllib.parse import urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from crawler_common.gav_cache import DEFAULT_CACHE_DIR
+
+# Cache directory (index database plus content-addressed bodies); empty disables the cache
+HTTP_CACHE_DIR = os.getenv("HTTP_CACHE_DIR", os.path.join(DEFAULT_CACHE_DIR, "http") if DEFAULT_CACHE_DIR else "")
+
+# Total size of cached bodies before the least recently used entries are evicted
+HTTP_CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", 2 * 1024 ** 3))
+
+# Mutable documents (listings, maven-metadata.xml, indexes) younger than this are served without revalidating
+HTTP_CACHE_FRESH_FOR = float(os.getenv("HTTP_CACHE_FRESH_FOR", 24 * 3600))
+
+# Serve everything from the cache and answer misses with 504 instead of touching the network
+HTTP_CACHE_OFFLINE = os.getenv("HTTP_CACHE_OFFLINE", "").lower() in ("1", "true", "yes")
+
+# Released files never change once published, so they are never revalidated
+IMMUTABLE_SUFFIXES = (".pom", ".jar", ".aar", ".war", ".module", ".sha1", ".md5")
+
+# Response headers kept with a cached body
+STORED_HEADERS = ("Content-Type", "Content-Length", "Last-Modified", "ETag", "Date")
+
+CACHEABLE_METHODS = ("GET", "HEAD")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    method TEXT NOT NULL,
+    url TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    digest TEXT,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (method, url)
+)
+"""
+
+# Eviction walks entries from the least recently used
+ACCESS_INDEX = "CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)"
+
+# Entries read per query while evicting
+EVICT_BATCH = 1000
+
+
+def is_immutable(url):
+    path = urlsplit(url).path
+    return path.endswith(IMMUTABLE_SUFFIXES) and "SNAPSHOT" not in path
+
+
+def build_response(method, url, status, headers, body):
+    """Rebuilds a requests.Response from a cached entry."""
+    response = requests.Response()
+    response.status_code = status
+    response.headers = CaseInsensitiveDict(headers)
+    response._content = body if method != "HEAD" else b""
+    response.url = url
+    response.encoding = get_encoding_from_headers(response.headers)
+    response.reason = "OK" if status == 200 else ""
+    response.elapsed = timedelta(0)
+    response.from_cache = True
+    return response
+
+
+def is_offline_miss(response):
+    """Whether a response is the 504 an offline cache answers for a request it has no entry for."""
+    return getattr(response, "offline_miss", False)
+
+
+class HttpCache:
+    """
+    On-disk HTTP cache under the shared session.
+    - Bodies are stored once per SHA-256 digest under objects/; index.sqlite maps (method, URL) to a digest
+      plus the validators (ETag, Last-Modified) used for If-None-Match / If-Modified-Since.
+    - Released files (IMMUTABLE_SUFFIXES outside SNAPSHOT paths) are never stale; other documents are served
+      directly for fresh_for seconds and revalidated after that.
+    - Least recently used entries are evicted once the bodies exceed max_bytes; the total is summed once when
+      the cache is opened and kept up to date by store() and eviction.
+    """
+
+    def __init__(self, directory, max_bytes=HTTP_CACHE_MAX_BYTES, fresh_for=HTTP_CACHE_FRESH_FOR, offline=HTTP_CACHE_OFFLINE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.fresh_for = fresh_for
+        self.offline = offline
+        self.counters = {"hits": 0, "revalidated": 0, "misses": 0, "stored": 0, "evicted": 0, "offline_misses": 0}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(directory, "index.sqlite"), check_same_thread=False, timeout=30)
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(SCHEMA)
+            self._db.execute(ACCESS_INDEX)
+            self._bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _object_path(self, digest):
+        return os.path.join(self.directory, "objects", digest[:2], digest)
+
+    def _read_body(self, digest):
+        if digest is None:
+            return b""
+        try:
+            with open(self._object_path(digest), "rb") as file:
+                return file.read()
+        except OSError:
+            return None
+
+    def _write_body(self, body):
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as file:
+                file.write(body)
+            os.replace(tmp_path, path)
+        return digest
+
+    def lookup(self, method, url):
+        """Returns the cached entry for a request as a dict, or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT status, headers, digest, stored_at FROM responses WHERE method = ? AND url = ?",
+                (method, url)).fetchone()
+        if row is None:
+            return None
+        body = self._read_body(row[2])
+        if body is None:
+            return None  # body evicted or removed behind our back
+        return {"status": row[0], "headers": json.loads(row[1]), "body": body, "stored_at": row[3]}
+
+    def is_fresh(self, url, entry):
+        return self.offline or is_immutable(url) or time.time() - entry["stored_at"] < self.fresh_for
+
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry["headers"].get("ETag"):
+            headers["If-None-Match"] = entry["headers"]["ETag"]
+        if entry["headers"].get("Last-Modified"):
+            headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+        return headers
+
+    def store(self, method, url, response):
+        body = response.content if method != "HEAD" else b""
+        digest = self._write_body(body) if body else None
+        headers = {name: response.headers[name] for name in STORED_HEADERS if name in response.headers}
+        now = time.time()
+        with self._lock, self._db:
+            previous = self._db.execute(
+                "SELECT size FROM responses WHERE method = ? AND url = ?", (method, url)).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (method, url, response.status_code, json.dumps(headers), digest, len(body), now, now))
+            self._bytes += len(body) - (previous[0] if previous else 0)
+            self.counters["stored"] += 1
+            over = self._bytes > self.max_bytes
+        if over:
+            self._evict()
+
+    def touch(self, method, url, refreshed=False):
+        now = time.time()
+        with self._lock, self._db:
+            if refreshed:
+                self._db.execute("UPDATE responses SET stored_at = ?, accessed_at = ? WHERE method = ? AND url = ?",
+                                 (now, now, method, url))
+            else:
+                self._db.execute("UPDATE responses SET accessed_at = ? WHERE method = ? AND url = ?", (now, method, url))
+
+    def _evict(self):
+        with self._lock, self._db:
+            if self._bytes <= self.max_bytes:
+                return
+            removed = []
+            while self._bytes > self.max_bytes * 0.9:
+                rows = self._db.execute(
+                    "SELECT method, url, digest, size FROM responses ORDER BY accessed_at LIMIT ?",
+                    (EVICT_BATCH,)).fetchall()
+                if not rows:
+                    break
+                for method, url, digest, size in rows:
+                    if self._bytes <= self.max_bytes * 0.9:
+                        break
+                    self._db.execute("DELETE FROM responses WHERE method = ? AND url = ?", (method, url))
+                    self._bytes -= size
+                    self.counters["evicted"] += 1
+                    if digest:
+                        removed.append(digest)
+            # The same body may still be referenced by another URL
+            orphans = [digest for digest in set(removed) if self._db.execute(
+                "SELECT 1 FROM responses WHERE digest = ? LIMIT 1", (digest,)).fetchone() is None]
+        for digest in orphans:
+            try:
+                os.remove(self._object_path(digest))
+            except OSError:
+                pass
+
+    def request(self, method, url, send, **kwargs):
+        """
+        Serves a request from the cache or sends it with send(method, url, **kwargs), caching 200 answers.
+        - Requests with their own headers/params or a body bypass the cache.
+        """
+        if method not in CACHEABLE_METHODS or any(kwargs.get(name) for name in ("headers", "params", "data", "json")):
+            return send(method, url, **kwargs)
+
+        entry = self.lookup(method, url)
+        if entry is not None and self.is_fresh(url, entry):
+            self._count("hits")
+            self.touch(method, url)
+            return build_response(method, url, entry["status"], entry["headers"], entry["body"])
+        if self.offline:
+            self._count("offline_misses")
+            # Marked so callers do not take the cache's gap for a failing server (see is_offline_miss)
+            response = build_response(method, url, 504, {}, b"")
+            response.offline_miss = True
+            return response
+
+        if entry is not None:
+            kwargs["headers"] = self.conditional_headers(entry)
+        response = send(method, url, **kwargs)
+        if entry is not None and response.status_code == 304:
+            self._count("revalidated")
+            self.touch(method, url, refreshed=True)
+            return build_response(method, url, entry["status"], entry["headers"], entry["body"])
+
+        self._count("misses")
+        if response.status_code == 200:
+            self.store(method, url, response)
+        return response
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats["entries"] = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            stats["bytes"] = self._bytes
+        return stats
@@ -0,0 +1,128 @@
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from crawler_common import rate_control
+from crawler_common.http_cache import HTTP_CACHE_DIR, HttpCache
+
+# (connect, read) timeout in seconds applied to every request that does not set its own
+DEFAULT_TIMEOUT = (10, 30)
+
+# Number of distinct hosts kept in the pool manager and keep-alive connections kept per host
+POOL_HOSTS = 16
+POOL_MAXSIZE = 64
+
+_session = None
+_session_lock = threading.Lock()
+_cache = None
+_local_repository = None
+
+
+def get_session():
+    """Returns the process-wide session whose adapter keeps one keep-alive connection pool per host."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_MAXSIZE, pool_block=True)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def get_cache():
+    """Returns the process-wide HTTP response cache, or None when HTTP_CACHE_DIR is empty."""
+    global _cache
+    if _cache is None and HTTP_CACHE_DIR:
+        with _session_lock:
+            if _cache is None:
+                _cache = HttpCache(HTTP_CACHE_DIR)
+    return _cache
+
+
+def set_local_repository(local_repository):
+    """Makes GETs read POMs from, and write downloaded POMs and metadata into, a local_repository.LocalRepository."""
+    global _local_repository
+    _local_repository = local_repository
+
+
+def request(method, url, **kwargs):
+    """
+    Sends a request over the shared session, applying DEFAULT_TIMEOUT unless a timeout is given.
+    - POMs already in the local Maven repository (see set_local_repository) are read from disk.
+    - GET/HEAD answers come from the on-disk cache when it has them (revalidated if stale).
+    - The host's rate controller admits the request and learns from its status and latency.
+    """
+    local_repository = _local_repository if method == "GET" else None
+    if local_repository is not None:
+        response = local_repository.lookup(url)
+        if response is not None:
+            return response
+    cache = get_cache()
+    if cache is not None:
+        response = cache.request(method, url, _send, **kwargs)
+    else:
+        response = _send(method, url, **kwargs)
+    if local_repository is not None and response.status_code == 200:
+        local_repository.seed(url, response.content)
+    return response
+
+
+def _send(method, url, **kwargs):
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    controller = rate_control.get_controller(urlsplit(url).hostname)
+    controller.acquire()
+    started = time.monotonic()
+    status, latency, retry_after = None, None, None
+    try:
+        response = get_session().request(method, url, **kwargs)
+        # Time to response headers, so large bodies don't read as congestion
+        status, latency = response.status_code, response.elapsed.total_seconds()
+        retry_after = response.headers.get("Retry-After")
+        return response
+    finally:
+        controller.release(status, latency if latency is not None else time.monotonic() - started, retry_after)
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def head(url, **kwargs):
+    return request("HEAD", url, **kwargs)
+
+
+def connection_stats():
+    """
+    Reports connection reuse per host.
+    - requests: requests sent over the host's pool (redirect targets count under their own host).
+    - connections: new TCP/TLS connections the pool had to open.
+    - reused: requests served over an already-open keep-alive connection.
+    """
+    stats = {}
+    adapters = {id(adapter): adapter for adapter in get_session().adapters.values()}
+    for adapter in adapters.values():
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host = stats.setdefault(pool.host, {"requests": 0, "connections": 0, "reused": 0})
+            host["requests"] += pool.num_requests
+            host["connections"] += pool.num_connections
+            host["reused"] += max(pool.num_requests - pool.num_connections, 0)
+    return stats
+
+
+def print_connection_stats():
+    for host, host_stats in sorted(connection_stats().items()):
+        print(f"🔌 {host}: {host_stats}")
+    if _cache is not None:
+        print(f"💾 HTTP cache: {_cache.stats()}")
+    if _local_repository is not None:
+        print(f"📦 Local Maven repository {_local_repository.directory}: {_local_repository.stats()}")
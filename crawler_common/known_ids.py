@@ -0,0 +1,103 @@
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+
+# Collections larger than this are loaded into a Bloom filter instead of a set
+BLOOM_THRESHOLD = 2_000_000
+
+# False positive rate of the Bloom filter (each false positive costs one find_one)
+BLOOM_ERROR_RATE = 0.001
+
+# _ids read per round trip while loading
+LOAD_BATCH_SIZE = 10000
+
+# Ids written during the run kept exactly in Bloom filter mode, a multiple of the write-behind store's
+# buffer (storage.MAX_BUFFERED) so every write still waiting to be flushed is among them
+RECENT_IDS = 100_000
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (double hashing on a 128-bit BLAKE2b digest)."""
+
+    def __init__(self, capacity, error_rate=BLOOM_ERROR_RATE):
+        capacity = max(capacity, 1)
+        self.size = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.hashes = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class KnownIds:
+    """
+    Answers "is this _id already in the collection?" from memory.
+    - On first use every existing _id is loaded: into a set, or into a Bloom filter when the collection
+      has more than bloom_threshold documents. Only a Bloom filter hit is confirmed with find_one.
+    - add() records ids written during the run, so they are known before the write-behind store has
+      flushed them: in the set, or in the Bloom filter plus a bounded list of the last recent_ids ids
+      (a Bloom filter hit on an id that is not written yet must not be denied by find_one). Older ids
+      have been flushed long since, so the database confirms them like any other hit.
+    """
+
+    def __init__(self, collection, bloom_threshold=BLOOM_THRESHOLD, recent_ids=RECENT_IDS):
+        self.collection = collection
+        self.bloom_threshold = bloom_threshold
+        self.lookups = 0
+        self.db_checks = 0
+        self._loaded = None
+        self.recent_ids = recent_ids
+        self.added = 0
+        self._recent = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._loaded is not None:
+                return self._loaded
+            count = self.collection.estimated_document_count()
+            loaded = BloomFilter(count) if count > self.bloom_threshold else set()
+            for document in self.collection.find({}, {"_id": 1}, batch_size=LOAD_BATCH_SIZE):
+                loaded.add(document["_id"])
+            kind = "Bloom filter" if isinstance(loaded, BloomFilter) else "set"
+            print(f"🧠 Loaded {count} known ids into a {kind}")
+            self._loaded = loaded
+            return loaded
+
+    def add(self, dependency_id):
+        loaded = self._loaded if self._loaded is not None else self._load()
+        with self._lock:
+            self.added += 1
+            loaded.add(dependency_id)
+            if isinstance(loaded, BloomFilter):
+                self._recent[dependency_id] = None
+                self._recent.move_to_end(dependency_id)
+                if len(self._recent) > self.recent_ids:
+                    self._recent.popitem(last=False)
+
+    def __contains__(self, dependency_id):
+        loaded = self._loaded if self._loaded is not None else self._load()
+        self.lookups += 1
+        if dependency_id not in loaded:
+            return False
+        if not isinstance(loaded, BloomFilter):
+            return True
+        with self._lock:
+            if dependency_id in self._recent:
+                return True
+        # Probable hit: confirm with the database
+        self.db_checks += 1
+        return self.collection.find_one({"_id": dependency_id}, {"_id": 1}) is not None
+
+    def stats(self):
+        return {"lookups": self.lookups, "db_checks": self.db_checks, "added": self.added}
@@ -0,0 +1,84 @@
+import os
+import tempfile
+import threading
+
+from crawler_common.gav_cache import DEFAULT_CACHE_DIR
+from crawler_common.http_cache import build_response
+
+# Local repository the crawler manages and hands to mvn (-Dmaven.repo.local)
+DEFAULT_LOCAL_REPOSITORY = os.path.join(DEFAULT_CACHE_DIR, "m2-repository") if DEFAULT_CACHE_DIR else ""
+
+METADATA_FILE = "maven-metadata.xml"
+
+
+class LocalRepository:
+    """
+    Maven local repository (standard layout) shared by the crawler's HTTP fetches and mvn.
+    - Every POM and maven-metadata.xml the crawler downloads from one of the remotes ({repository id: root URL})
+      is written where mvn looks for it, so mvn does not download it again.
+    - POMs already there (written by the crawler or downloaded by mvn) are read from disk instead of fetched.
+    - POMs are written without a _remote.repositories marker, which Maven treats as available to any
+      repository, also offline; metadata is stored per repository as maven-metadata-<id>.xml, as mvn does.
+    """
+
+    def __init__(self, directory, remotes):
+        self.directory = directory
+        self.remotes = remotes
+        self.counters = {"poms_seeded": 0, "metadata_seeded": 0, "downloads_saved": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _locate(self, url):
+        """Returns (path in the local repository, is POM) for a remote file the local repository holds, or None."""
+        for repository_id, root in self.remotes.items():
+            if not url.startswith(root):
+                continue
+            relative = url[len(root):].split("?", 1)[0]
+            parts = relative.split("/")
+            if "SNAPSHOT" in relative or ".." in parts:
+                return None
+            if relative.endswith(".pom"):
+                return os.path.join(self.directory, *parts), True
+            if parts[-1] == METADATA_FILE:
+                return os.path.join(self.directory, *parts[:-1], f"maven-metadata-{repository_id}.xml"), False
+        return None
+
+    def lookup(self, url):
+        """Returns a response built from a POM already in the local repository, or None."""
+        located = self._locate(url)
+        if located is None or not located[1]:
+            return None  # metadata changes upstream, so it is only ever written here, never served
+        try:
+            with open(located[0], "rb") as file:
+                body = file.read()
+        except OSError:
+            return None
+        self._count("downloads_saved")
+        return build_response("GET", url, 200, {"Content-Type": "text/xml"}, body)
+
+    def seed(self, url, body):
+        """Writes a downloaded POM (once) or maven-metadata.xml (refreshed) into the local repository."""
+        located = self._locate(url)
+        if located is None:
+            return
+        path, is_pom = located
+        if is_pom and os.path.exists(path):
+            return
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so a concurrent mvn never reads a half-written file
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "wb") as file:
+                file.write(body)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠ Could not write {path} into the local repository: {e}")
+            return
+        self._count("poms_seeded" if is_pom else "metadata_seeded")
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters)
@@ -0,0 +1,59 @@
+import xml.etree.ElementTree as ET
+
+from packaging.version import InvalidVersion
+from packaging.version import parse as parse_version
+
+
+def parse_metadata(xml):
+    """
+    Parses an artifact-level maven-metadata.xml.
+    Returns {"latest", "release", "versions", "last_updated"} or None if the document has no <versioning>.
+    """
+    try:
+        root = ET.fromstring(xml)
+    except ET.ParseError:
+        return None
+    versioning = root.find("versioning")
+    if versioning is None:
+        return None
+    versions = [element.text.strip() for element in versioning.findall("versions/version") if element.text]
+    return {
+        "latest": (versioning.findtext("latest") or "").strip() or None,
+        "release": (versioning.findtext("release") or "").strip() or None,
+        "versions": versions,
+        "last_updated": (versioning.findtext("lastUpdated") or "").strip() or None,
+    }
+
+
+def is_snapshot(version):
+    return version.endswith("-SNAPSHOT") or version == "SNAPSHOT"
+
+
+def highest_version(versions):
+    """
+    Returns the highest of versions: compared semantically (packaging.version), or lexicographically when one
+    of them does not parse; None if there are none.
+    """
+    versions = list(versions)
+    if not versions:
+        return None
+    try:
+        return max(versions, key=parse_version)
+    except InvalidVersion:
+        return max(versions)
+
+
+def latest_release(metadata):
+    """
+    Picks the version to crawl: the highest non-SNAPSHOT entry of <versions> (not the last one: <versions> and
+    <release> follow deploy order, so a backport deployed after a newer line would win), else <release>,
+    else <latest>.
+    - Of versions that compare equal, the one named by <release> is kept (e.g. "1.0" and "1.0.0").
+    """
+    releases = [version for version in metadata["versions"] if not is_snapshot(version)]
+    release = metadata["release"]
+    if release and release in releases:
+        # Put it first so that it wins ties: max() keeps the first of equal items
+        releases.remove(release)
+        releases.insert(0, release)
+    return highest_version(releases) or release or metadata["latest"]
@@ -0,0 +1,361 @@
+import asyncio
+import os
+import re
+import shutil
+import tempfile
+from xml.sax.saxutils import escape
+
+from crawler_common.gav_cache import GavCache
+from crawler_common.pom_resolver import MAX_PARENT_DEPTH, UnresolvableModel, parse_model
+
+MVN = shutil.which("mvn") or "mvn"
+
+# Try each batch with mvn -o first (everything it needs may already be in the local repository, which the
+# crawler fills with every POM it downloads) and only go online when that fails
+OFFLINE_FIRST = os.getenv("MVN_OFFLINE_FIRST", "1").lower() not in ("0", "false", "no")
+
+# Record the direct dependencies of every node of each resolved tree, not only of the requested artifacts,
+# so that dependencies met in an earlier tree are stored without an mvn run of their own
+CAPTURE_SUBTREES = os.getenv("MVN_CAPTURE_SUBTREES", "1").lower() not in ("0", "false", "no")
+
+# Verbose trees keep the nodes Maven omitted (duplicates, conflict losers) in parentheses, which tells a pruned
+# node from a real leaf; the structured outputs (json, tgf, graphml) drop that marker. Verbose needs 3.2.0+
+TREE_GOAL = "dependency:tree"
+VERBOSE_TREE_GOAL = "org.apache.maven.plugins:maven-dependency-plugin:3.7.1:tree"
+
+# mvn timeout for a batch: fixed JVM/Maven startup plus a share per artifact
+BATCH_TIMEOUT_BASE = 30
+BATCH_TIMEOUT_PER_ARTIFACT = 5
+
+# Lets several mvn processes share one local repository without corrupting it (Maven 3.9+; ignored before)
+SHARED_REPOSITORY_ARGS = (
+    "-Daether.syncContext.named.factory=file-lock",
+    "-Daether.syncContext.named.nameMapper=file-gav",
+)
+
+# Group and version of the generated reactor and its modules
+BATCH_GROUP_ID = "temp-group"
+BATCH_VERSION = "1.0"
+
+REACTOR_TEMPLATE = """<project>
+    <modelVersion>4.0.0</modelVersion>
+    <groupId>{group_id}</groupId>
+    <artifactId>temp-batch</artifactId>
+    <version>{version}</version>
+    <packaging>pom</packaging>
+    <modules>
+{modules}
+    </modules>
+</project>"""
+
+MODULE_TEMPLATE = """<project>
+    <modelVersion>4.0.0</modelVersion>
+    <groupId>{group_id}</groupId>
+    <artifactId>{module}</artifactId>
+    <version>{version}</version>
+{repositories}
+    <dependencies>
+        <dependency>
+            <groupId>{dep_group_id}</groupId>
+            <artifactId>{dep_artifact_id}</artifactId>
+            <version>{dep_version}</version>
+        </dependency>
+    </dependencies>
+</project>"""
+
+# Verbose annotations of a node whose version or scope was changed from what its parent declared:
+# "(version managed from 1.0; scope managed from runtime)", "scope updated from runtime"
+MANAGED_VERSION = re.compile(r"version managed from ([^\s;)]+)")
+MANAGED_SCOPE = re.compile(r"scope (?:managed|updated) from ([^\s;)]+)")
+
+# "--- maven-dependency-plugin:3.6.0:tree (default-cli) @ artifact-3 ---" (older and newer Maven spellings)
+MODULE_HEADER = re.compile(r"---\s+\S*:tree\s+\([^)]*\)\s+@\s+(\S+)\s+---")
+
+
+def module_name(index):
+    return f"artifact-{index}"
+
+
+def repositories_xml(repositories):
+    """Renders a {repository_id: url} mapping as a <repositories> block."""
+    if not repositories:
+        return ""
+    entries = "\n".join(
+        f"        <repository>\n            <id>{escape(repo_id)}</id>\n            <url>{escape(url)}</url>\n        </repository>"
+        for repo_id, url in repositories.items()
+    )
+    return f"    <repositories>\n{entries}\n    </repositories>"
+
+
+def write_reactor(project_dir, coordinates, repositories=None):
+    """
+    Writes a reactor with one module per artifact so that Maven mediates each artifact's
+    dependencies on its own instead of mixing them in one dependency list.
+    """
+    os.makedirs(project_dir, exist_ok=True)
+    modules = []
+    for index, (group_id, artifact_id, version) in enumerate(coordinates):
+        module = module_name(index)
+        modules.append(f"        <module>{module}</module>")
+        module_dir = os.path.join(project_dir, module)
+        os.makedirs(module_dir, exist_ok=True)
+        with open(os.path.join(module_dir, "pom.xml"), "w") as file:
+            file.write(MODULE_TEMPLATE.format(
+                group_id=BATCH_GROUP_ID, module=module, version=BATCH_VERSION,
+                repositories=repositories_xml(repositories),
+                dep_group_id=escape(group_id), dep_artifact_id=escape(artifact_id), dep_version=escape(version),
+            ))
+    pom_path = os.path.join(project_dir, "pom.xml")
+    with open(pom_path, "w") as file:
+        file.write(REACTOR_TEMPLATE.format(group_id=BATCH_GROUP_ID, version=BATCH_VERSION, modules="\n".join(modules)))
+    return pom_path
+
+
+def parse_tree_node(line):
+    """
+    Parses one dependency:tree line into (depth, "group:artifact:version:scope", omitted, declared).
+    - Depth 0 is the artifact the module depends on; depth 1 are its direct dependencies.
+    - omitted marks the parenthesised nodes of a verbose tree, which Maven did not expand.
+    - declared is the same dependency with the version and scope its parent asked for, before the
+      dependencyManagement of the tree's root or scope mediation changed them (verbose trees only).
+    """
+    depth = (len(line) - len(line.lstrip(" |"))) // 3
+    node = re.sub(r"^[\s|+\\-]+", "", line)
+    omitted = node.startswith("(")
+    parts = node.lstrip("(").split(" ")[0].split(":")
+    if len(parts) < 5:
+        return None
+    # group:artifact:type[:classifier]:version:scope
+    group_id, artifact_id = parts[0], parts[1]
+    version, scope = parts[-2], parts[-1]
+    declared_version = MANAGED_VERSION.search(node)
+    declared_scope = MANAGED_SCOPE.search(node)
+    declared = ":".join((group_id, artifact_id,
+                         declared_version.group(1) if declared_version else version,
+                         declared_scope.group(1) if declared_scope else scope))
+    return depth, f"{group_id}:{artifact_id}:{version}:{scope}", omitted, declared
+
+
+def parse_tree_line(line):
+    """Parses one dependency:tree line into (depth, "group:artifact:version:scope")."""
+    node = parse_tree_node(line)
+    return node and node[:2]
+
+
+def parse_dependency_tree(output, subtrees=None, excludes=None):
+    """
+    Splits reactor dependency:tree output into {module: [direct dependencies]}.
+    - With a subtrees dict, also records {(group, artifact, version): [direct dependencies]} for every deeper
+      node whose list is complete: expanded (not omitted) and in compile scope, so its children carry the
+      scopes they would have if the node itself were resolved. Children are listed as the node declared
+      them: omitted ones with the version it asked for, managed ones with their version before management.
+    - Exclusions do not show in the tree, so nodes below a POM that declares any are not recorded;
+      excludes(gav) tells whether a POM (or its parents) does, and without it no node is recorded.
+    """
+    trees = {}
+    module = None
+    path = []  # path[depth]: GAV of the recordable ancestor at that depth, or None
+    excluding = []  # excluding[depth]: whether a POM at or above that depth declares exclusions
+    for line in output.splitlines():
+        if line.startswith("[INFO] "):
+            line = line[len("[INFO] "):]
+        header = MODULE_HEADER.search(line)
+        if header:
+            module = header.group(1)
+            trees[module] = []
+            path = []
+            excluding = []
+            continue
+        if module is None or not ("+- " in line or "\\- " in line):
+            continue
+        parsed = parse_tree_node(line)
+        if not parsed:
+            continue
+        depth, dependency, omitted, declared = parsed
+        if depth == 1:
+            trees[module].append(dependency)
+        if subtrees is None:
+            continue
+        del path[depth:]
+        del excluding[depth:]
+        parent = path[depth - 1] if 0 < depth <= len(path) else None
+        if parent is not None:
+            subtrees[parent].append(declared)
+        gav = tuple(dependency.split(":")[:3])
+        below_exclusions = any(excluding) or excludes is None
+        recordable = depth >= 1 and not omitted and dependency.endswith(":compile") and not below_exclusions
+        path.extend([None] * (depth - len(path)))
+        path.append(gav if recordable else None)
+        excluding.extend([True] * (depth - len(excluding)))
+        excluding.append(below_exclusions or (not omitted and excludes(gav)))
+        if recordable:
+            subtrees.setdefault(gav, [])
+    return trees
+
+
+def declares_exclusions(local_repository, group_id, artifact_id, version):
+    """Whether a POM in a local repository or one of its parents declares exclusions (also if one is missing)."""
+    for _ in range(MAX_PARENT_DEPTH):
+        pom_path = os.path.join(local_repository, *group_id.split("."), artifact_id, version,
+                                f"{artifact_id}-{version}.pom")
+        try:
+            with open(pom_path, encoding="utf-8", errors="replace") as file:
+                pom_xml = file.read()
+            if "<exclusion" in pom_xml:
+                return True
+            parent = parse_model(pom_xml)["parent"]
+        except (OSError, UnresolvableModel):
+            return True
+        if not parent:
+            return False
+        if not all(parent.values()):
+            return True
+        group_id, artifact_id, version = parent["groupId"], parent["artifactId"], parent["version"]
+    return True
+
+
+async def run_batch(coordinates, project_dir, repositories=None, extra_args=(), subtrees=None, excludes=None):
+    """
+    Runs one mvn dependency:tree over a reactor of the given artifacts in project_dir.
+    Returns a list of direct dependency lists in input order, or None if mvn failed or timed out.
+    - With a subtrees dict, the verbose tree is requested and every complete node is added to it
+      (see parse_dependency_tree for excludes).
+    """
+    shutil.rmtree(project_dir, ignore_errors=True)
+    pom_path = write_reactor(project_dir, coordinates, repositories)
+    timeout = BATCH_TIMEOUT_BASE + BATCH_TIMEOUT_PER_ARTIFACT * len(coordinates)
+    goal = [TREE_GOAL] if subtrees is None else [VERBOSE_TREE_GOAL, "-Dverbose"]
+    try:
+        process = await asyncio.create_subprocess_exec(
+            MVN, "-B", *goal, "-f", pom_path, *extra_args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except Exception as e:
+        print(f"⚠ Error running mvn dependency:tree: {e}")
+        return None
+
+    try:
+        stdout, _ = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        print(f"⚠ mvn timed out after {timeout}s on a batch of {len(coordinates)}")
+        process.kill()
+        await process.wait()
+        return None
+    except asyncio.CancelledError:
+        process.kill()
+        await process.wait()
+        raise
+
+    if process.returncode != 0:
+        return None
+    trees = parse_dependency_tree(stdout.decode("utf-8", errors="replace"), subtrees, excludes)
+    return [trees.get(module_name(index), []) for index in range(len(coordinates))]
+
+
+async def resolve_batch(coordinates, project_dir, repositories=None, extra_args=(), subtrees=None, excludes=None):
+    """
+    Resolves direct dependencies for many artifacts with as few mvn runs as possible.
+    - A failing batch is bisected until the failing artifacts are isolated; those get None.
+    """
+    if not coordinates:
+        return []
+    results = await run_batch(coordinates, project_dir, repositories, extra_args, subtrees, excludes)
+    if results is not None:
+        return results
+    if len(coordinates) == 1:
+        group_id, artifact_id, version = coordinates[0]
+        print(f"⚠ mvn dependency:tree failed for {group_id}:{artifact_id}:{version}")
+        return [None]
+    middle = len(coordinates) // 2
+    return (await resolve_batch(coordinates[:middle], project_dir, repositories, extra_args, subtrees, excludes)
+            + await resolve_batch(coordinates[middle:], project_dir, repositories, extra_args, subtrees, excludes))
+
+
+class MavenWorkerPool:
+    """
+    Runs mvn batches in parallel, each worker in its own temporary project directory.
+    - All workers share one local repository (Maven's default, or local_repository if given);
+      Maven's file-lock sync context keeps concurrent downloads into it safe.
+    - close() removes the worker directories.
+    - With offline_first, every batch is first run with -o against the local repository (which the crawler
+      seeds with the POMs it fetched, see local_repository) and only run online if that fails.
+    - With capture_subtrees, the direct dependencies of every complete node of each tree are kept in a
+      persistent GavCache; artifacts already found there are answered without running mvn. Whether a node
+      sits below exclusions is read from the POMs in the local repository.
+    """
+
+    def __init__(self, size=None, repositories=None, local_repository=None, capture_subtrees=CAPTURE_SUBTREES,
+                 offline_first=OFFLINE_FIRST):
+        self.size = size or os.cpu_count() or 1
+        self.repositories = repositories
+        self.offline_first = offline_first
+        self.extra_args = list(SHARED_REPOSITORY_ARGS)
+        if local_repository:
+            self.extra_args.append(f"-Dmaven.repo.local={local_repository}")
+        self.local_repository = local_repository or os.path.expanduser(os.path.join("~", ".m2", "repository"))
+        self.exclusions = {}
+        self.subtrees = GavCache("mvn-subtrees") if capture_subtrees else None
+        self.counters = {"resolved_by_mvn": 0, "known_subtrees": 0, "captured_subtrees": 0, "offline_batches": 0}
+        self.project_dirs = [tempfile.mkdtemp(prefix=f"mvn-worker-{index}-") for index in range(self.size)]
+        self._free = None
+        self._loop = None
+
+    def _free_dirs(self):
+        """Queue of idle worker directories, rebuilt when used from a new event loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._free = asyncio.Queue()
+            for project_dir in self.project_dirs:
+                self._free.put_nowait(project_dir)
+        return self._free
+
+    async def resolve(self, coordinates):
+        """Resolves a batch on the next idle worker; returns one direct dependency list (or None) per coordinate."""
+        if self.subtrees is None:
+            return await self._run(coordinates)
+        results = [self.subtrees.get(coordinate) for coordinate in coordinates]
+        missing = [index for index, result in enumerate(results) if result is None]
+        self.counters["known_subtrees"] += len(coordinates) - len(missing)
+        if not missing:
+            return results
+        captured = {}
+        resolved = await self._run([coordinates[index] for index in missing], captured)
+        for index, direct_deps in zip(missing, resolved):
+            results[index] = direct_deps
+            if direct_deps is not None:
+                captured[tuple(coordinates[index])] = direct_deps
+        for gav, direct_deps in captured.items():
+            self.subtrees.put(gav, direct_deps)
+        self.counters["captured_subtrees"] += len(captured)
+        return results
+
+    async def _run(self, coordinates, subtrees=None):
+        free = self._free_dirs()
+        project_dir = await free.get()
+        try:
+            self.counters["resolved_by_mvn"] += len(coordinates)
+            if self.offline_first:
+                offline_args = [*self.extra_args, "-o"]
+                results = await run_batch(coordinates, project_dir, self.repositories, offline_args, subtrees,
+                                          self._declares_exclusions)
+                if results is not None:
+                    self.counters["offline_batches"] += 1
+                    return results
+            return await resolve_batch(coordinates, project_dir, self.repositories, self.extra_args, subtrees,
+                                       self._declares_exclusions)
+        finally:
+            free.put_nowait(project_dir)
+
+    def _declares_exclusions(self, gav):
+        if gav not in self.exclusions:
+            self.exclusions[gav] = declares_exclusions(self.local_repository, *gav)
+        return self.exclusions[gav]
+
+    def stats(self):
+        return dict(self.counters)
+
+    def close(self):
+        for project_dir in self.project_dirs:
+            shutil.rmtree(project_dir, ignore_errors=True)
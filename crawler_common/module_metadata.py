@@ -0,0 +1,72 @@
+import json
+from collections import OrderedDict
+
+from crawler_common.pom_resolver import UnresolvableModel
+
+# Gradle only reads the .module file of artifacts whose POM carries this marker comment
+GRADLE_METADATA_MARKER = "published-with-gradle-metadata"
+
+SUPPORTED_FORMAT_VERSIONS = ("1.0", "1.1")
+
+# Attributes of the variant releaseRuntimeClasspath selects from a library
+USAGE = "org.gradle.usage"
+CATEGORY = "org.gradle.category"
+BUILD_TYPE = "com.android.build.api.attributes.BuildTypeAttr"
+RUNTIME_USAGES = ("java-runtime", "java-runtime-jars")
+
+
+def _is_runtime_variant(variant):
+    attributes = variant.get("attributes") or {}
+    return (attributes.get(USAGE) in RUNTIME_USAGES
+            and attributes.get(CATEGORY, "library") == "library"
+            and attributes.get(BUILD_TYPE, "release") == "release")
+
+
+def _version(dependency):
+    """Version Gradle starts from for a dependency: strictly, else requires, else prefer."""
+    constraint = dependency.get("version") or {}
+    if constraint.get("rejectedVersions"):
+        raise UnresolvableModel(f"rejected versions on {dependency.get('group')}:{dependency.get('module')}")
+    version = constraint.get("strictly") or constraint.get("requires") or constraint.get("prefer")
+    if not version:
+        raise UnresolvableModel(f"no version for {dependency.get('group')}:{dependency.get('module')}")
+    if version[0] in "[(" or "," in version or version.endswith("+") or version.startswith("latest."):
+        raise UnresolvableModel(f"dynamic version {version}")
+    return version
+
+
+def runtime_dependencies(module_json):
+    """
+    Returns `group:artifact:version` for the dependencies of the runtime (release) variant of a
+    Gradle Module Metadata file, in declaration order.
+    - Raises UnresolvableModel when Gradle would have to decide: no or several differing runtime
+      variants, variants published elsewhere (available-at), dynamic versions, or constraints
+      that move a direct dependency to another version.
+    """
+    try:
+        metadata = json.loads(module_json)
+    except ValueError as e:
+        raise UnresolvableModel(f"malformed module metadata: {e}")
+    if metadata.get("formatVersion") not in SUPPORTED_FORMAT_VERSIONS:
+        raise UnresolvableModel(f"unsupported module metadata format {metadata.get('formatVersion')}")
+
+    candidates = [variant for variant in metadata.get("variants") or [] if _is_runtime_variant(variant)]
+    if not candidates:
+        raise UnresolvableModel("no runtime variant")
+    if any("available-at" in variant for variant in candidates):
+        raise UnresolvableModel("runtime variant is published in another module")
+
+    results = set()
+    for variant in candidates:
+        direct = OrderedDict()
+        for dependency in variant.get("dependencies") or []:
+            key = (dependency["group"], dependency["module"])
+            direct[key] = _version(dependency)
+        for constraint in variant.get("dependencyConstraints") or []:
+            key = (constraint["group"], constraint["module"])
+            if key in direct and _version(constraint) != direct[key]:
+                raise UnresolvableModel(f"constraint changes the version of {':'.join(key)}")
+        results.add(tuple(f"{group}:{module}:{version}" for (group, module), version in direct.items()))
+    if len(results) > 1:
+        raise UnresolvableModel("runtime variants declare different dependencies")
+    return list(results.pop())
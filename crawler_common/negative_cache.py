@@ -0,0 +1,157 @@
+import os
+import sqlite3
+import threading
+import time
+
+import requests
+
+from crawler_common.gav_cache import DEFAULT_CACHE_DIR
+from crawler_common.http_cache import is_offline_miss
+
+# One database per crawler (a coordinate missing from one repository may exist in another); empty keeps
+# failures in memory for the current run only
+NEGATIVE_CACHE_DIR = os.getenv(
+    "NEGATIVE_CACHE_DIR", os.path.join(DEFAULT_CACHE_DIR, "negative") if DEFAULT_CACHE_DIR else "")
+
+# Failure classes
+NOT_FOUND = "not_found"        # the repository answered 404/410
+CLIENT_ERROR = "client_error"  # any other 4xx but 408/429 (400, 401, 403, 405, ...): the request is refused
+SERVER_ERROR = "server_error"  # 5xx, 429 or any other unexpected status
+TIMEOUT = "timeout"            # timeouts, connection errors and 408
+UNRESOLVABLE = "unresolvable"  # mvn/Gradle could not resolve the artifact
+
+FETCH_FAILURES = (NOT_FOUND, CLIENT_ERROR, SERVER_ERROR, TIMEOUT)
+
+# Fetch failures that asking again will not fix: not retried, only negative-cached
+PERMANENT_FAILURES = (NOT_FOUND, CLIENT_ERROR)
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# Retry policy per failure class: (seconds a coordinate is skipped after its first failure, upper bound).
+# Every further failure of the same coordinate doubles the time until it is tried again.
+RETRY_POLICIES = {
+    NOT_FOUND: (7 * DAY, 90 * DAY),
+    CLIENT_ERROR: (DAY, 30 * DAY),
+    SERVER_ERROR: (HOUR, DAY),
+    TIMEOUT: (10 * 60, 6 * HOUR),
+    UNRESOLVABLE: (DAY, 30 * DAY),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS failures (
+    key TEXT PRIMARY KEY,
+    failure TEXT NOT NULL,
+    failures INTEGER NOT NULL,
+    until REAL NOT NULL,
+    reason TEXT NOT NULL
+)
+"""
+
+
+def classify_status(status):
+    """Returns the failure class of an HTTP status, or None for success."""
+    if status < 400:
+        return None
+    if status in (404, 410):
+        return NOT_FOUND
+    if status == 408:
+        return TIMEOUT
+    if status < 500 and status != 429:
+        return CLIENT_ERROR
+    return SERVER_ERROR
+
+
+def classify_exception(error):
+    """
+    Returns the failure class of an exception raised while crawling an artifact, or None if it is not one.
+    - A miss of the offline HTTP cache is not one: the repository was never asked.
+    """
+    if isinstance(error, (requests.Timeout, requests.ConnectionError)):
+        return TIMEOUT
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        if is_offline_miss(error.response):
+            return None
+        return classify_status(error.response.status_code)
+    return None
+
+
+def negative_cache_path(name):
+    """Returns the database path of a crawler's negative cache, or ":memory:" when NEGATIVE_CACHE_DIR is empty."""
+    if not NEGATIVE_CACHE_DIR:
+        return ":memory:"
+    os.makedirs(NEGATIVE_CACHE_DIR, exist_ok=True)
+    return os.path.join(NEGATIVE_CACHE_DIR, f"{name}.sqlite")
+
+
+class NegativeCache:
+    """
+    Coordinates (or any other key) that recently failed, so the crawl skips them until their TTL expires.
+    - record() files a failure under a class of RETRY_POLICIES; the TTL doubles with every repeated failure,
+      up to the class's bound. clear() forgets a key once it succeeded.
+    - Entries live in SQLite and are all held in memory as well: failures are few, lookups are many.
+    """
+
+    def __init__(self, path, policies=None):
+        self.path = path
+        self.policies = dict(RETRY_POLICIES)
+        self.policies.update(policies or {})
+        self.counters = {"recorded": 0, "skipped": 0, "cleared": 0}
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(SCHEMA)
+            self._entries = {key: (failure, failures, until, reason)
+                             for key, failure, failures, until, reason in self._db.execute("SELECT * FROM failures")}
+
+    def check(self, key, classes=None):
+        """Returns (failure class, reason) while a key is to be skipped (for a failure of classes, if given), else None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[2] <= time.time() or (classes is not None and entry[0] not in classes):
+                return None
+            self.counters["skipped"] += 1
+            return entry[0], entry[3]
+
+    def record(self, key, failure, reason=""):
+        """Files a failure of a key; returns the number of seconds it will be skipped."""
+        first, bound = self.policies[failure]
+        with self._lock, self._db:
+            previous = self._entries.get(key)
+            failures = previous[1] + 1 if previous and previous[0] == failure else 1
+            ttl = min(first * 2 ** (failures - 1), bound)
+            entry = (failure, failures, time.time() + ttl, str(reason)[:500])
+            self._entries[key] = entry
+            self._db.execute("INSERT OR REPLACE INTO failures VALUES (?, ?, ?, ?, ?)", (key, *entry))
+            self.counters["recorded"] += 1
+        return ttl
+
+    def clear(self, key, classes=None):
+        """Forgets a key that succeeded (only a failure of classes, if given)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (classes is not None and entry[0] not in classes):
+                return
+            with self._db:
+                del self._entries[key]
+                self._db.execute("DELETE FROM failures WHERE key = ?", (key,))
+                self.counters["cleared"] += 1
+
+    def stats(self):
+        with self._lock:
+            now = time.time()
+            active = {}
+            for failure, _, until, _ in self._entries.values():
+                if until > now:
+                    active[failure] = active.get(failure, 0) + 1
+            return {**self.counters, "active": active}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def open_negative_cache(name):
+    """Opens the negative cache of a crawler."""
+    return NegativeCache(negative_cache_path(name))
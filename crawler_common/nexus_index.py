@@ -0,0 +1,191 @@
+import gzip
+import io
+import struct
+from datetime import datetime, timezone
+
+from packaging.version import InvalidVersion
+from packaging.version import parse as parse_version
+
+# Name of the full index export published under .index/ of Maven Central
+INDEX_FILE_NAME = "nexus-maven-repository-index.gz"
+
+SUPPORTED_INDEX_VERSIONS = (1,)
+
+# Bytes of decompressed data buffered while decoding; memory use does not grow with the file
+READ_BUFFER = 1 << 20
+
+# Record fields: UINFO is "group|artifact|version|classifier|extension",
+# INFO is "packaging|lastModified(ms)|size|sourcesExists|javadocExists|signatureExists|extension"
+UINFO = "u"
+INFO = "i"
+DELETED = "del"
+NO_CLASSIFIER = "NA"
+
+# Extensions whose size the crawlers record as jar_size (others are stored as "Unknown")
+JAR_EXTENSIONS = ("jar", "aar")
+
+# Timestamp format of the Maven Central directory listings, so both discovery paths store the same values
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M"
+
+
+class IndexFormatError(Exception):
+    """Raised when the index file is truncated or not a Nexus index."""
+
+
+def _decode(data):
+    """Decodes Java's modified UTF-8 (what DataOutputStream writes)."""
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        # NUL is written as C0 80 and supplementary characters as surrogate pairs
+        text = data.replace(b"\xc0\x80", b"\x00").decode("utf-8", "surrogatepass")
+        return text.encode("utf-16", "surrogatepass").decode("utf-16")
+
+
+def _encode(text):
+    return text.encode("utf-8")
+
+
+class _Reader:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def read(self, size, allow_eof=False):
+        data = self.stream.read(size)
+        if len(data) != size:
+            if allow_eof and not data:
+                return None
+            raise IndexFormatError("truncated index")
+        return data
+
+    def int(self, allow_eof=False):
+        data = self.read(4, allow_eof)
+        return None if data is None else struct.unpack(">i", data)[0]
+
+    def utf(self):
+        (length,) = struct.unpack(">H", self.read(2))
+        return _decode(self.read(length))
+
+    def string(self):
+        return _decode(self.read(self.int()))
+
+
+def read_documents(path):
+    """
+    Streams the records of a Nexus index export as {field name: value} dicts.
+    - Decompresses and decodes incrementally; only the current record is held in memory.
+    - The header (format version, index timestamp) is checked and skipped; see read_header().
+    """
+    with gzip.open(path, "rb") as raw:
+        reader = _Reader(io.BufferedReader(raw, READ_BUFFER))
+        _read_header(reader)
+        while True:
+            field_count = reader.int(allow_eof=True)
+            if field_count is None:
+                return
+            document = {}
+            for _ in range(field_count):
+                reader.read(1)  # flags (indexed/tokenized/stored), irrelevant here
+                name = reader.utf()
+                document[name] = reader.string()
+            yield document
+
+
+def _read_header(reader):
+    (version,) = struct.unpack(">b", reader.read(1))
+    if version not in SUPPORTED_INDEX_VERSIONS:
+        raise IndexFormatError(f"unsupported index version {version}")
+    (timestamp,) = struct.unpack(">q", reader.read(8))
+    return None if timestamp == -1 else timestamp
+
+
+def read_header(path):
+    """Returns the index creation time in milliseconds since the epoch, or None."""
+    with gzip.open(path, "rb") as raw:
+        return _read_header(_Reader(raw))
+
+
+def write_index(path, documents, timestamp=None):
+    """Writes documents ({field name: value}) in the export format; handy for small local fixtures."""
+    with gzip.open(path, "wb") as out:
+        out.write(struct.pack(">bq", SUPPORTED_INDEX_VERSIONS[0], -1 if timestamp is None else timestamp))
+        for document in documents:
+            out.write(struct.pack(">i", len(document)))
+            for name, value in document.items():
+                name, value = _encode(name), _encode(value)
+                out.write(struct.pack(">bH", 0, len(name)) + name)
+                out.write(struct.pack(">i", len(value)) + value)
+
+
+def _format_timestamp(milliseconds):
+    return datetime.fromtimestamp(milliseconds / 1000, tz=timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+
+def _is_newer(candidate, current):
+    """
+    Whether version candidate is higher than current: compared semantically, as the directory walk's
+    find_latest_version does, and lexicographically when either does not parse.
+    """
+    try:
+        return parse_version(candidate) > parse_version(current)
+    except InvalidVersion:
+        return candidate > current
+
+
+def _artifact_hints(artifacts):
+    """Yields the (group_id, artifact_id, version, hints) of the artifacts collected for one group."""
+    for (group_id, artifact_id), (version, last_modified, size) in artifacts.items():
+        hints = {}
+        if last_modified >= 0:
+            hints["last_modified"] = _format_timestamp(last_modified)
+        if size is None:
+            hints["jar_size"] = "Unknown"
+        elif size >= 0:
+            hints["jar_size"] = str(size)
+        yield group_id, artifact_id, version, hints
+
+
+def latest_artifacts(path):
+    """
+    Yields (group_id, artifact_id, version, hints) for the highest release of every artifact in the index
+    (not the most recently published one: a 1.x patch released after 2.0 does not win); hints holds
+    "last_modified" and "jar_size" when the index records them.
+    - Only main artifacts count (no classifier); SNAPSHOTs and deleted records are skipped.
+    - Of the records of the highest version, the JAR/AAR one gives the hints; other records of that version
+      (e.g. its POM) never replace them.
+    - The export keeps the records of a group together (it is grouped by UINFO prefix), so each group's
+      artifacts are yielded as soon as the next group starts: memory holds one group, and the crawl starts
+      while the rest of the file is still being decoded. A group that turned up again later would be yielded
+      again with the highest version of its later records.
+    """
+    group, latest = None, {}
+    for document in read_documents(path):
+        uinfo = document.get(UINFO)
+        if not uinfo or DELETED in document:
+            continue
+        parts = uinfo.split("|")
+        if len(parts) < 4 or parts[3] != NO_CLASSIFIER or parts[2].endswith("SNAPSHOT"):
+            continue
+        group_id, artifact_id, version = parts[:3]
+        if group_id != group:
+            yield from _artifact_hints(latest)
+            group, latest = group_id, {}
+
+        last_modified, size = -1, -1
+        info = document.get(INFO, "").split("|")
+        if len(info) > 2:
+            try:
+                last_modified, size = int(info[1]), int(info[2])
+            except ValueError:
+                pass
+        extension = parts[4] if len(parts) > 4 else (info[6] if len(info) > 6 else None)
+        if extension not in JAR_EXTENSIONS:
+            size = None
+
+        key = (group_id, artifact_id)
+        current = latest.get(key)
+        if (current is None or _is_newer(version, current[0])
+                or (version == current[0] and current[2] is None and size is not None)):
+            latest[key] = (version, last_modified, size)
+
+    yield from _artifact_hints(latest)
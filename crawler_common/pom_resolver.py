@@ -0,0 +1,325 @@
+import re
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+
+from crawler_common.gav_cache import DEFAULT_CACHE_DIR, GavCache
+
+# Scopes that Maven propagates from a dependency to its consumers (and so shows at depth 1 of the tree)
+TRANSITIVE_SCOPES = ("compile", "runtime")
+
+# Maximum number of parsed POMs kept in memory by one resolver; fetched parents and BOMs also go to disk
+MODEL_CACHE_SIZE = 4096
+
+# Maximum number of fetched POM texts (parents, BOMs) kept in memory for the resolution cache's content keys
+TEXT_CACHE_SIZE = 1024
+
+# Guards against parent cycles and runaway ${} expansion
+MAX_PARENT_DEPTH = 32
+MAX_INTERPOLATION_DEPTH = 16
+
+PLACEHOLDER = re.compile(r"\$\{([^}]+)\}")
+
+# "[1.2.3]": a range that allows exactly one version, which Maven and Gradle both pick
+HARD_REQUIREMENT = re.compile(r"^\[([^,\[\]()]+)\]$")
+
+DEPENDENCY_FIELDS = ("groupId", "artifactId", "version", "type", "classifier", "scope", "optional")
+
+
+class UnresolvableModel(Exception):
+    """Raised when a POM needs something the in-process resolver does not handle; callers fall back to mvn."""
+
+
+def _local(tag):
+    """Strips the XML namespace from an element tag."""
+    return tag.rsplit("}", 1)[-1]
+
+
+def _child(element, name):
+    if element is None:
+        return None
+    for child in element:
+        if _local(child.tag) == name:
+            return child
+    return None
+
+
+def _children(element, name):
+    if element is None:
+        return []
+    return [child for child in element if _local(child.tag) == name]
+
+
+def _elements(element):
+    return list(element) if element is not None else []
+
+
+def _text(element, name):
+    child = _child(element, name)
+    if child is None or child.text is None:
+        return None
+    return child.text.strip()
+
+
+def _parse_dependencies(container):
+    dependencies = []
+    for dep in _children(_child(container, "dependencies"), "dependency"):
+        dependencies.append({field: _text(dep, field) for field in DEPENDENCY_FIELDS})
+    return dependencies
+
+
+def _is_active_by_default(profile):
+    activation = _child(profile, "activation")
+    return activation is not None and _text(activation, "activeByDefault") == "true"
+
+
+def parse_model(pom_xml):
+    """
+    Parses a POM into a raw (uninterpolated) model dict.
+    - activeByDefault profiles are merged in; other profiles only matter if they add dependencies,
+      since those depend on the environment mvn runs in.
+    """
+    try:
+        root = ET.fromstring(pom_xml)
+    except ET.ParseError as e:
+        raise UnresolvableModel(f"malformed POM: {e}")
+    if _local(root.tag) != "project":
+        raise UnresolvableModel("not a POM")
+
+    parent_element = _child(root, "parent")
+    parent = None
+    if parent_element is not None:
+        parent = {field: _text(parent_element, field) for field in ("groupId", "artifactId", "version")}
+
+    properties = OrderedDict()
+    for prop in _elements(_child(root, "properties")):
+        properties[_local(prop.tag)] = (prop.text or "").strip()
+
+    dependencies = _parse_dependencies(root)
+    managed = _parse_dependencies(_child(root, "dependencyManagement"))
+
+    for profile in _children(_child(root, "profiles"), "profile"):
+        if _is_active_by_default(profile):
+            for prop in _elements(_child(profile, "properties")):
+                properties[_local(prop.tag)] = (prop.text or "").strip()
+            dependencies.extend(_parse_dependencies(profile))
+            managed.extend(_parse_dependencies(_child(profile, "dependencyManagement")))
+        elif _parse_dependencies(profile) or _parse_dependencies(_child(profile, "dependencyManagement")):
+            raise UnresolvableModel(f"profile {_text(profile, 'id')} changes dependencies")
+
+    relocation = _child(_child(root, "distributionManagement"), "relocation")
+    if relocation is not None:
+        raise UnresolvableModel("artifact is relocated")
+
+    return {
+        "groupId": _text(root, "groupId"),
+        "artifactId": _text(root, "artifactId"),
+        "version": _text(root, "version"),
+        "packaging": _text(root, "packaging") or "jar",
+        "name": _text(root, "name"),
+        "description": _text(root, "description"),
+        "url": _text(root, "url"),
+        "parent": parent,
+        "properties": properties,
+        "dependencies": dependencies,
+        "dependencyManagement": managed,
+    }
+
+
+def dependency_key(dependency):
+    """Management key Maven uses to match a dependency with its managed entry."""
+    return (dependency["groupId"], dependency["artifactId"],
+            dependency.get("type") or "jar", dependency.get("classifier") or "")
+
+
+def _merge_dependencies(child, parent):
+    """Child entries first, then parent entries the child does not redeclare (Maven inheritance order)."""
+    merged = OrderedDict((dependency_key(dep), dep) for dep in child)
+    for dep in parent:
+        merged.setdefault(dependency_key(dep), dep)
+    return list(merged.values())
+
+
+class Interpolator:
+    """Expands ${...} expressions against a model's project.* values and merged properties."""
+
+    def __init__(self, model):
+        self.model = model
+        self.properties = model["properties"]
+
+    def _model_value(self, expression):
+        parts = expression.split(".")
+        if parts[0] in ("project", "pom"):
+            parts = parts[1:]
+        value = self.model
+        for part in parts:
+            if not isinstance(value, dict) or value.get(part) is None:
+                return None
+            value = value[part]
+        return value if isinstance(value, str) else None
+
+    def lookup(self, expression):
+        if expression.startswith(("project.", "pom.")):
+            return self._model_value(expression)
+        if expression in self.properties:
+            return self.properties[expression]
+        if expression in ("groupId", "artifactId", "version", "packaging"):
+            return self._model_value(expression)  # legacy unprefixed model expressions
+        return None
+
+    def interpolate(self, value, depth=0):
+        if value is None or "${" not in value:
+            return value
+        if depth > MAX_INTERPOLATION_DEPTH:
+            raise UnresolvableModel(f"recursive expression in {value}")
+
+        def replace(match):
+            resolved = self.lookup(match.group(1))
+            if resolved is None:
+                return match.group(0)  # leave unknown expressions as Maven does
+            return self.interpolate(resolved, depth + 1)
+
+        return PLACEHOLDER.sub(replace, value)
+
+    def interpolate_dependency(self, dependency):
+        return {field: self.interpolate(value) for field, value in dependency.items()}
+
+
+class PomResolver:
+    """
+    Computes effective POMs in-process and derives the same direct dependency list that
+    `mvn dependency:tree` prints at depth 1 for an artifact.
+    - fetch_pom(group_id, artifact_id, version) returns POM text or None and is used for parents and BOMs.
+      Their parsed models are cached by GAV in memory and on disk, their text in memory (see pom_text).
+    - Raises UnresolvableModel for what it does not handle (version ranges, relocations,
+      environment-specific profiles, unresolved expressions) so callers can fall back to mvn.
+    """
+
+    def __init__(self, fetch_pom, cache_size=MODEL_CACHE_SIZE, cache_dir=DEFAULT_CACHE_DIR, text_cache_size=TEXT_CACHE_SIZE):
+        self.fetch_pom = fetch_pom
+        self.models = GavCache("models", cache_size, cache_dir)
+        self.texts = GavCache("pom-texts", text_cache_size, directory="")
+
+    def pom_text(self, group_id, artifact_id, version):
+        """Returns the text of a parent or BOM POM (None when missing), fetching it only when it is not cached."""
+        gav = (group_id, artifact_id, version)
+        pom_xml = self.texts.get(gav)
+        if pom_xml is None:
+            pom_xml = self.fetch_pom(group_id, artifact_id, version)
+            if pom_xml:
+                self.texts.put(gav, pom_xml)
+        return pom_xml
+
+    def raw_model(self, group_id, artifact_id, version, pom_xml=None):
+        """Returns the parsed POM of a coordinate, fetching it unless pom_xml is given."""
+        gav = (group_id, artifact_id, version)
+        model = self.models.get(gav)
+        if model is None:
+            # Only fetched POMs (parents, BOMs) are worth persisting; artifacts are crawled once
+            persist = pom_xml is None
+            if pom_xml is None:
+                pom_xml = self.pom_text(group_id, artifact_id, version)
+            if not pom_xml:
+                raise UnresolvableModel(f"POM not found for {group_id}:{artifact_id}:{version}")
+            model = parse_model(pom_xml)
+            self.models.put(gav, model, persist=persist)
+        return model
+
+    def inherited_model(self, group_id, artifact_id, version, pom_xml=None, depth=0):
+        """Merges a POM with its parent chain without interpolating (expressions resolve in the child's context)."""
+        if depth > MAX_PARENT_DEPTH:
+            raise UnresolvableModel("parent chain too deep")
+        model = dict(self.raw_model(group_id, artifact_id, version, pom_xml))
+        parent = model["parent"]
+        if not parent:
+            return model
+        if not all(parent.values()) or any("${" in value for value in parent.values()):
+            raise UnresolvableModel(f"incomplete parent reference {parent}")
+
+        parent_model = self.inherited_model(parent["groupId"], parent["artifactId"], parent["version"], depth=depth + 1)
+        model["groupId"] = model["groupId"] or parent["groupId"]
+        model["version"] = model["version"] or parent["version"]
+        for field in ("name", "description", "url"):
+            model[field] = model[field] or parent_model[field]
+        properties = OrderedDict(parent_model["properties"])
+        properties.update(model["properties"])
+        model["properties"] = properties
+        model["dependencies"] = _merge_dependencies(model["dependencies"], parent_model["dependencies"])
+        model["dependencyManagement"] = _merge_dependencies(model["dependencyManagement"], parent_model["dependencyManagement"])
+        return model
+
+    def parent_chain(self, group_id, artifact_id, version, pom_xml=None):
+        """Returns the (group, artifact, version) of every parent of a POM, nearest first."""
+        chain = []
+        parent = self.raw_model(group_id, artifact_id, version, pom_xml)["parent"]
+        while parent:
+            if len(chain) >= MAX_PARENT_DEPTH:
+                raise UnresolvableModel("parent chain too deep")
+            if not all(parent.values()) or any("${" in value for value in parent.values()):
+                raise UnresolvableModel(f"incomplete parent reference {parent}")
+            gav = (parent["groupId"], parent["artifactId"], parent["version"])
+            chain.append(gav)
+            parent = self.raw_model(*gav)["parent"]
+        return chain
+
+    def effective_model(self, group_id, artifact_id, version, pom_xml=None, importing=()):
+        """
+        Builds the effective POM: parent inheritance, ${} interpolation, BOM imports and
+        dependencyManagement applied to the declared dependencies.
+        """
+        gav = (group_id, artifact_id, version)
+        if gav in importing:
+            raise UnresolvableModel(f"BOM import cycle at {group_id}:{artifact_id}:{version}")
+
+        model = self.inherited_model(group_id, artifact_id, version, pom_xml)
+        interpolator = Interpolator(model)
+        dependencies = [interpolator.interpolate_dependency(dep) for dep in model["dependencies"]]
+
+        managed = OrderedDict()
+        imports = []
+        for dep in model["dependencyManagement"]:
+            dep = interpolator.interpolate_dependency(dep)
+            if dep["scope"] == "import" and (dep["type"] or "jar") == "pom":
+                imports.append(dep)
+            else:
+                managed.setdefault(dependency_key(dep), dep)
+
+        # Entries declared in the POM win over imported ones; earlier imports win over later ones
+        for bom in imports:
+            if "${" in (bom["version"] or "${"):
+                raise UnresolvableModel(f"unresolved BOM version for {bom['groupId']}:{bom['artifactId']}")
+            bom_model = self.effective_model(bom["groupId"], bom["artifactId"], bom["version"], importing=importing + (gav,))
+            for dep in bom_model["dependencyManagement"]:
+                managed.setdefault(dependency_key(dep), dep)
+
+        for dep in dependencies:
+            management = managed.get(dependency_key(dep))
+            if management:
+                for field in ("version", "scope", "optional"):
+                    if not dep[field]:
+                        dep[field] = management[field]
+            dep["scope"] = dep["scope"] or "compile"
+
+        model["dependencies"] = dependencies
+        model["dependencyManagement"] = list(managed.values())
+        return model
+
+    def direct_dependencies(self, group_id, artifact_id, version, pom_xml=None):
+        """Returns `group:artifact:version:scope` for each dependency mvn would list at depth 1."""
+        model = self.effective_model(group_id, artifact_id, version, pom_xml)
+        direct = OrderedDict()
+        for dep in model["dependencies"]:
+            if dep["scope"] not in TRANSITIVE_SCOPES or dep["optional"] == "true":
+                continue
+            coordinate = (dep["groupId"], dep["artifactId"], dep["version"])
+            if not all(coordinate) or any("${" in value for value in coordinate):
+                raise UnresolvableModel(f"unresolved dependency {':'.join(str(v) for v in coordinate)}")
+            version = dep["version"]
+            hard = HARD_REQUIREMENT.match(version)
+            if hard:
+                version = hard.group(1).strip()
+            elif version[0] in "[(" or "," in version:
+                raise UnresolvableModel(f"version range {version}")
+            # A later declaration of the same dependency wins, as in Maven
+            direct.pop(dependency_key(dep), None)
+            direct[dependency_key(dep)] = f"{dep['groupId']}:{dep['artifactId']}:{version}:{dep['scope']}"
+        return list(direct.values())
@@ -0,0 +1,215 @@
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+
+# Status codes that mean the server wants us to slow down
+THROTTLE_STATUSES = (429, 503)
+
+# Starting/min/max concurrency and request rate (req/s) per host
+DEFAULT_LIMITS = {"concurrency": 4, "min_concurrency": 1, "max_concurrency": 64,
+                  "rate": 10.0, "min_rate": 0.5, "max_rate": 200.0}
+HOST_LIMITS = {
+    "repo.maven.apache.org": {"concurrency": 8, "rate": 20.0},
+    "packages.atlassian.com": {"concurrency": 4, "rate": 10.0},
+    "repository.cloudera.com": {"concurrency": 4, "rate": 10.0},
+    "dl.google.com": {"concurrency": 8, "rate": 20.0},
+    "maven.google.com": {"concurrency": 8, "rate": 20.0},
+}
+
+# Latency (EWMA) above this multiple of the best observed latency, and at least
+# LATENCY_SLACK seconds above it, counts as congestion
+LATENCY_FACTOR = 3.0
+LATENCY_SLACK = 0.05
+LATENCY_SMOOTHING = 0.2
+
+# Multiplicative decrease factor and minimum seconds between two decreases
+DECREASE_FACTOR = 0.5
+DECREASE_COOLDOWN = 2.0
+
+# Failed requests in a row (connection errors, timeouts, 5xx) that open a host's circuit, and seconds it then
+# stays open; every failed probe after that doubles the pause, up to CIRCUIT_MAX_COOLDOWN
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", 5))
+CIRCUIT_COOLDOWN = 30.0
+CIRCUIT_MAX_COOLDOWN = 600.0
+
+
+class CircuitOpen(requests.ConnectionError):
+    """Raised instead of sending a request to a host whose circuit is open; retry_after is the pause left."""
+
+    def __init__(self, host, retry_after):
+        super().__init__(f"circuit open for {host}, retry in {retry_after:.0f}s")
+        self.host = host
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value):
+    """Returns the number of seconds a Retry-After header asks us to wait (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class HostController:
+    """
+    Token bucket plus AIMD concurrency limit for one host.
+    - Every success adds 1/limit to the concurrency limit (≈ +1 per round trip window) and raises the rate.
+    - 429/503, connection errors or latency climbing past LATENCY_FACTOR × baseline halve both.
+    - A Retry-After header pauses the host until it has passed.
+    - Circuit breaker: after CIRCUIT_FAILURE_THRESHOLD failed requests in a row the host is paused and
+      requests raise CircuitOpen without being sent. Once the pause is over, one request probes the host:
+      success closes the circuit, failure opens it again for twice as long.
+    """
+
+    def __init__(self, host, concurrency, min_concurrency, max_concurrency, rate, min_rate, max_rate):
+        self.host = host
+        self.concurrency = float(concurrency)
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.rate = float(rate)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.in_flight = 0
+        self.tokens = 1.0
+        self.last_refill = time.monotonic()
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+        self.latency = None
+        self.best_latency = None
+        self.throttled = 0
+        self.failures = 0
+        self.circuit_until = 0.0  # 0 while closed
+        self.cooldown = CIRCUIT_COOLDOWN
+        self.probing = False
+        self.circuits_opened = 0
+        self._cond = threading.Condition()
+
+    def _refill(self, now):
+        self.tokens = min(self.tokens + (now - self.last_refill) * self.rate, max(self.rate, 1.0))
+        self.last_refill = now
+
+    def acquire(self):
+        """Blocks until the host has a free concurrency slot, a rate token and is not paused (see CircuitOpen)."""
+        with self._cond:
+            self._check_circuit()
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                elif self.in_flight >= int(self.concurrency):
+                    wait = None  # woken by release()
+                elif self.tokens < 1.0:
+                    wait = (1.0 - self.tokens) / self.rate
+                else:
+                    self.tokens -= 1.0
+                    self.in_flight += 1
+                    return
+                self._cond.wait(wait)
+
+    def _check_circuit(self):
+        if not self.circuit_until:
+            return
+        now = time.monotonic()
+        if now < self.circuit_until or self.probing:
+            raise CircuitOpen(self.host, max(self.circuit_until - now, 1.0))
+        # Half-open: this request finds out whether the host is back
+        self.probing = True
+
+    def _update_circuit(self, now, failed):
+        if not failed:
+            if self.circuit_until:
+                print(f"🔌 Circuit closed for {self.host}")
+            self.failures = 0
+            self.circuit_until = 0.0
+            self.cooldown = CIRCUIT_COOLDOWN
+            self.probing = False
+            return
+        self.failures += 1
+        if self.probing:
+            self.cooldown = min(self.cooldown * 2, CIRCUIT_MAX_COOLDOWN)
+        elif self.circuit_until or self.failures < CIRCUIT_FAILURE_THRESHOLD:
+            return
+        self.probing = False
+        self.circuit_until = now + self.cooldown
+        self.circuits_opened += 1
+        print(f"🔌 Circuit open for {self.host} after {self.failures} failed requests in a row; pausing {self.cooldown:.0f}s")
+
+    def release(self, status, latency, retry_after=None):
+        """Records the outcome of a request and adjusts the limits."""
+        with self._cond:
+            self.in_flight -= 1
+            now = time.monotonic()
+            pause = parse_retry_after(retry_after)
+            if pause:
+                self.paused_until = max(self.paused_until, now + pause)
+            self._update_circuit(now, status is None or status >= 500)
+
+            congested = status is None or status in THROTTLE_STATUSES
+            if status is not None:
+                self.latency = latency if self.latency is None else (
+                    LATENCY_SMOOTHING * latency + (1 - LATENCY_SMOOTHING) * self.latency)
+                if self.best_latency is None or self.latency < self.best_latency:
+                    self.best_latency = self.latency
+                if self.latency > max(self.best_latency * LATENCY_FACTOR, self.best_latency + LATENCY_SLACK):
+                    congested = True
+
+            if congested:
+                self.throttled += 1
+                if now - self.last_decrease >= DECREASE_COOLDOWN:
+                    self.last_decrease = now
+                    self.concurrency = max(self.concurrency * DECREASE_FACTOR, self.min_concurrency)
+                    self.rate = max(self.rate * DECREASE_FACTOR, self.min_rate)
+                    # Forget the latency history so a slower but stable server can grow again
+                    self.best_latency = self.latency
+            else:
+                self.concurrency = min(self.concurrency + 1.0 / self.concurrency, self.max_concurrency)
+                self.rate = min(self.rate + 1.0 / self.concurrency, self.max_rate)
+            self._cond.notify_all()
+
+    def limits(self):
+        with self._cond:
+            return {
+                "concurrency": int(self.concurrency),
+                "in_flight": self.in_flight,
+                "rate": round(self.rate, 2),
+                "latency_ms": round(self.latency * 1000) if self.latency is not None else None,
+                "throttled": self.throttled,
+                "paused_for": round(max(self.paused_until - time.monotonic(), 0.0), 1),
+                "circuit": "closed" if not self.circuit_until else "half-open" if self.probing else "open",
+                "circuits_opened": self.circuits_opened,
+            }
+
+
+_controllers = {}
+_controllers_lock = threading.Lock()
+
+
+def get_controller(host):
+    """Returns the shared controller for a host, creating it from HOST_LIMITS on first use."""
+    with _controllers_lock:
+        controller = _controllers.get(host)
+        if controller is None:
+            settings = dict(DEFAULT_LIMITS)
+            settings.update(HOST_LIMITS.get(host, {}))
+            controller = _controllers[host] = HostController(host, **settings)
+        return controller
+
+
+def current_limits():
+    with _controllers_lock:
+        controllers = list(_controllers.values())
+    return {controller.host: controller.limits() for controller in controllers}
+
+
+def print_limits():
+    for host, limits in sorted(current_limits().items()):
+        print(f"🚦 {host}: {limits}")
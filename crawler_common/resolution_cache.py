@@ -0,0 +1,88 @@
+import hashlib
+import re
+
+from crawler_common.gav_cache import DEFAULT_CACHE_DIR, DEFAULT_MEMORY_SIZE, GavCache
+from crawler_common.pom_resolver import UnresolvableModel
+
+# Stands in for the artifact's own version in shared entries; it is what a POM would write for it anyway
+VERSION_PLACEHOLDER = "${project.version}"
+
+# A BOM import pulls in dependencyManagement from a POM that is not part of the key
+BOM_IMPORT = re.compile(r"<scope>\s*import\s*</scope>")
+
+
+class ResolutionCache:
+    """
+    Resolved direct dependency lists keyed by a SHA-256 of the content they were resolved from: the artifact's
+    POM, any extra document the resolver reads (e.g. its .module file) and the POMs of its parent chain.
+    - Entries are persisted in a GavCache under the shared cache directory, so recrawls and the other
+      crawlers using the same name reuse them; content that changes gets a new key.
+    - With share_versions, the artifact's version is replaced by VERSION_PLACEHOLDER wherever it is a whole
+      element value (in the documents and in the cached list), so releases whose POMs differ only by their
+      version share one entry. POMs that import BOMs keep their version in the key.
+    """
+
+    def __init__(self, name, share_versions=True, memory_size=DEFAULT_MEMORY_SIZE, directory=DEFAULT_CACHE_DIR):
+        self.entries = GavCache(name, memory_size, directory)
+        self.share_versions = share_versions
+
+    def key(self, version, documents):
+        """Returns the key for an artifact's documents (POM first)."""
+        digest = hashlib.sha256()
+        shared = self.share_versions and not any(BOM_IMPORT.search(document) for document in documents)
+        element_value = re.compile(rf">\s*{re.escape(version)}\s*<")
+        for document in documents:
+            if shared:
+                document = element_value.sub(f">{VERSION_PLACEHOLDER}<", document)
+            digest.update(document.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def content_key(self, resolver, group_id, artifact_id, version, pom_xml, extra=()):
+        """
+        Returns the key of an artifact, reading its parent chain through a PomResolver; None if a parent is missing.
+        - The parents' texts come from the resolver's cache, which parent_chain has just filled, so a parent
+          shared by many artifacts is fetched once, not once per artifact.
+        """
+        documents = [pom_xml, *extra]
+        try:
+            for gav in resolver.parent_chain(group_id, artifact_id, version, pom_xml):
+                parent_xml = resolver.pom_text(*gav)
+                if not parent_xml:
+                    return None
+                documents.append(parent_xml)
+        except UnresolvableModel:
+            return None
+        return self.key(version, documents)
+
+    def _entry(self, key):
+        # Two directory levels keep the number of files per directory small
+        return key[:2], key[2:4], key
+
+    def get(self, key, version):
+        """Returns the dependency list cached for a key, in terms of the given version, or None."""
+        if key is None:
+            return None
+        direct_deps = self.entries.get(self._entry(key))
+        if direct_deps is None:
+            return None
+        return [_replace_version(dep, VERSION_PLACEHOLDER, version) for dep in direct_deps]
+
+    def put(self, key, version, direct_deps):
+        """Caches a resolved dependency list; failed resolutions (None) are not cached."""
+        if key is None or direct_deps is None:
+            return
+        if self.share_versions:
+            direct_deps = [_replace_version(dep, version, VERSION_PLACEHOLDER) for dep in direct_deps]
+        self.entries.put(self._entry(key), direct_deps)
+
+    def stats(self):
+        return self.entries.stats()
+
+
+def _replace_version(dependency, old, new):
+    """Swaps the version of a `group:artifact:version[:scope]` string if it equals old."""
+    parts = dependency.split(":")
+    if len(parts) > 2 and parts[2] == old:
+        parts[2] = new
+    return ":".join(parts)
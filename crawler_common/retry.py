@@ -0,0 +1,48 @@
+import os
+import random
+import time
+
+import requests
+from pymongo.errors import ConnectionFailure
+
+from crawler_common.negative_cache import SERVER_ERROR, TIMEOUT, classify_exception
+from crawler_common.rate_control import CircuitOpen, parse_retry_after
+
+# Retries after the first attempt for transient failures (see is_transient)
+RETRY_ATTEMPTS = int(os.getenv("RETRY_ATTEMPTS", 3))
+
+# Each retry waits a random time between 0 and min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2^retry) seconds
+# ("full jitter": workers that failed together do not come back together)
+RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", 1.0))
+RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", 60.0))
+
+
+def is_transient(error):
+    """Whether an error may go away on its own: timeouts, connection errors, 408/429/5xx, an open circuit, MongoDB failover."""
+    return isinstance(error, ConnectionFailure) or classify_exception(error) in (TIMEOUT, SERVER_ERROR)
+
+
+def backoff_delay(retry, error=None):
+    """
+    Seconds to wait before retry number retry (0-based); an open circuit, or the Retry-After of an HTTP error
+    (429, 408, 503), is waited out at least.
+    """
+    delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** retry))
+    if isinstance(error, CircuitOpen):
+        delay = max(delay, error.retry_after)
+    elif isinstance(error, requests.HTTPError) and error.response is not None:
+        delay = max(delay, parse_retry_after(error.response.headers.get("Retry-After")) or 0)
+    return delay
+
+
+def call_with_retry(func, *args, attempts=RETRY_ATTEMPTS, **kwargs):
+    """Calls func, retrying transient errors up to attempts times with jittered exponential backoff."""
+    for retry in range(attempts + 1):
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            if retry >= attempts or not is_transient(e):
+                raise
+            delay = backoff_delay(retry, e)
+            print(f"↻ {e}; retrying in {delay:.1f}s ({retry + 1}/{attempts})")
+            time.sleep(delay)
@@ -0,0 +1,195 @@
+import atexit
+import threading
+import time
+from concurrent.futures import Future
+
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from crawler_common.retry import backoff_delay
+
+# Writes sent to MongoDB in one bulk_write, and seconds a write may wait in the buffer before it is flushed
+BATCH_SIZE = 500
+FLUSH_INTERVAL = 2.0
+
+# Writers block (backpressure) once this many writes are waiting
+MAX_BUFFERED = 10000
+
+# Connections kept by the shared client
+MAX_POOL_SIZE = 32
+
+# Attempts per batch; writes are idempotent upserts, so repeating one is safe
+WRITE_ATTEMPTS = 3
+
+DUPLICATE_KEY = 11000
+
+
+class WriteFailed(Exception):
+    """Set on the Future of an add() whose operations could not all be written."""
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(uri):
+    """Returns the process-wide pooled MongoClient for a URI."""
+    with _clients_lock:
+        client = _clients.get(uri)
+        if client is None:
+            client = _clients[uri] = MongoClient(uri, maxPoolSize=MAX_POOL_SIZE)
+        return client
+
+
+def artifact_upsert(dependency_id, fields, child_modules=()):
+    """Idempotent write of an artifact's own record; child modules are merged, never duplicated."""
+    return UpdateOne(
+        {"_id": dependency_id},
+        {"$set": fields, "$addToSet": {"child_modules": {"$each": list(child_modules)}}},
+        upsert=True,
+    )
+
+
+def parent_link(parent_id, child_id, placeholder):
+    """
+    Idempotent write linking a child to its parent module.
+    - placeholder fields are only written when the parent has no record yet ($setOnInsert).
+    """
+    return UpdateOne(
+        {"_id": parent_id},
+        {"$addToSet": {"child_modules": child_id}, "$setOnInsert": placeholder},
+        upsert=True,
+    )
+
+
+class WriteBehindStore:
+    """
+    Buffers write operations and sends them to a collection with bulk_write from a background thread.
+    - A batch is flushed once BATCH_SIZE writes are waiting, FLUSH_INTERVAL seconds after the oldest
+      waiting write, or on close().
+    - add() only blocks when MAX_BUFFERED writes are already waiting, so the database stays off the
+      crawl's critical path while memory stays bounded.
+    - Writes are idempotent upserts, so a batch that failed (or half-failed) is simply sent again.
+    - add() returns a Future that completes once all of its operations are acknowledged by MongoDB
+      (or fails with WriteFailed), so callers can track durability without waiting for it.
+    """
+
+    def __init__(self, collection, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL, max_buffered=MAX_BUFFERED):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+        self.written = 0
+        self.flushes = 0
+        self.failed = 0
+        self._buffer = []
+        self._oldest = None
+        self._closed = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+        # Scripts that never call close() still get their buffered writes flushed on exit
+        atexit.register(self.close)
+
+    def add(self, *operations):
+        """Queues operations; returns a Future resolved (with None) once they are all written."""
+        written = _Written(len(operations))
+        if not operations:
+            written.future.set_result(None)
+            return written.future
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("store is closed")
+            while len(self._buffer) >= self.max_buffered:
+                self._cond.wait()
+            if not self._buffer:
+                self._oldest = time.monotonic()
+            self._buffer.extend((operation, written) for operation in operations)
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify_all()
+        return written.future
+
+    def _take_batch(self):
+        """Waits until a batch is due and removes it from the buffer (empty list once closed and drained)."""
+        with self._cond:
+            while True:
+                if self._buffer and (self._closed or len(self._buffer) >= self.batch_size
+                                     or time.monotonic() - self._oldest >= self.flush_interval):
+                    batch = self._buffer[:self.batch_size]
+                    del self._buffer[:self.batch_size]
+                    self._oldest = time.monotonic() if self._buffer else None
+                    self._cond.notify_all()
+                    return batch
+                if self._closed:
+                    return []
+                timeout = None if not self._buffer else max(self.flush_interval - (time.monotonic() - self._oldest), 0)
+                self._cond.wait(timeout)
+
+    def _write(self, batch):
+        failed = []
+        for attempt in range(1, WRITE_ATTEMPTS + 1):
+            try:
+                self.collection.bulk_write([operation for operation, _ in batch], ordered=False)
+                self.written += len(batch)
+                batch = []
+                break
+            except BulkWriteError as e:
+                # Only two upserts racing on a new _id are worth retrying; other write errors would repeat
+                write_errors = e.details.get("writeErrors", [])
+                retry = [batch[error["index"]] for error in write_errors if error.get("code") == DUPLICATE_KEY]
+                errors = [error for error in write_errors if error.get("code") != DUPLICATE_KEY]
+                for error in errors:
+                    print(f"⚠ Write failed: {error.get('errmsg')}")
+                    failed.append(batch[error["index"]])
+                self.failed += len(errors)
+                self.written += len(batch) - len(write_errors)
+                batch = retry
+                if not batch:
+                    break
+            except PyMongoError as e:
+                print(f"⚠ Bulk write of {len(batch)} operations failed (attempt {attempt}/{WRITE_ATTEMPTS}): {e}")
+                if attempt < WRITE_ATTEMPTS:
+                    time.sleep(backoff_delay(attempt - 1))
+        self.failed += len(batch)
+        failed.extend(batch)
+        self.flushes += 1
+        return failed
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                return
+            failed = {id(entry) for entry in self._write(batch)}
+            for entry in batch:
+                entry[1].settle(id(entry) not in failed)
+
+    def close(self):
+        """Flushes everything still buffered and stops the background thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def stats(self):
+        with self._cond:
+            buffered = len(self._buffer)
+        return {"written": self.written, "flushes": self.flushes, "failed": self.failed, "buffered": buffered}
+
+
+class _Written:
+    """Tracks the operations of one add() until every one of them has been written or has failed."""
+
+    def __init__(self, count):
+        self.future = Future()
+        self.remaining = count
+        self.ok = True
+
+    def settle(self, ok):
+        # Only the writer thread calls this, so no lock is needed
+        self.ok = self.ok and ok
+        self.remaining -= 1
+        if self.remaining == 0:
+            if self.ok:
+                self.future.set_result(None)
+            else:
+                self.future.set_exception(WriteFailed("some operations could not be written"))
@@ -1,50 +1,121 @@
-import json
-import requests
 import xml.etree.ElementTree as ET
-import subprocess
 import os
-import re
-from pymongo import MongoClient
+from pymongo import UpdateOne
 from datetime import datetime
-import time
 from dotenv import load_dotenv
 from packaging import version  # for proper version comparison
+import asyncio
+import sys
+
+# The shared modules read their settings (caches, worker counts) when imported, so load .env first
+load_dotenv()
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from crawler_common import export, http_client, rate_control, storage
+from crawler_common.engine import CrawlEngine
+from crawler_common.dead_letter import open_dead_letters
+from crawler_common.frontier import open_frontier
+from crawler_common.negative_cache import PERMANENT_FAILURES, SERVER_ERROR, UNRESOLVABLE, classify_status, open_negative_cache
+from crawler_common.gradle_runner import GradleWorkerPool
+from crawler_common.http_cache import is_offline_miss
+from crawler_common.module_metadata import GRADLE_METADATA_MARKER, runtime_dependencies
+from crawler_common.pom_resolver import PomResolver, UnresolvableModel
+from crawler_common.resolution_cache import ResolutionCache
+from crawler_common.retry import call_with_retry, is_transient
+from crawler_common.storage import WriteBehindStore
+
 #Get all necessary info and store it mongodb
 # MongoDB connection setup (configure as needed)
-load_dotenv()
 MONGO_URI = os.getenv("MONGO_URI")
-client = MongoClient(MONGO_URI)
+client = storage.get_client(MONGO_URI)
 DB_NAME = "maven_artifacts_google"
 COLLECTION_NAME = "artifact_metadata4"
 
 # Get the current directory where the script is located
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 ANDROID_PROJECT_DIR = SCRIPT_DIR
-BUILD_GRADLE_PATH = os.path.join(ANDROID_PROJECT_DIR, "build.gradle")
+GRADLE_WORKERS = int(os.getenv("GRADLE_WORKERS", 2))  # warm Gradle daemons, ~1 GB of memory each
+GRADLE_BATCH_SIZE = 25
 GOOGLE_MAVEN_INDEX = "https://maven.google.com/master-index.xml"
 GOOGLE_MAVEN_BASE = "https://maven.google.com/"
+GROUP_INDEX_WORKERS = 16  # group-index.xml files fetched at the same time
+
+gradle_pool = GradleWorkerPool(ANDROID_PROJECT_DIR, GRADLE_WORKERS)
 
 # Initialize MongoDB connection
 def get_mongo_collection():
-    client = MongoClient(MONGO_URI)
     db = client[DB_NAME]
     return db[COLLECTION_NAME]
 
+# Writes are batched in the background so MongoDB latency stays off the crawl path
+store = WriteBehindStore(get_mongo_collection())
+
+# Progress of the full crawl survives restarts (and is shared by all workers with FRONTIER_STORE=mongodb)
+frontier = open_frontier("google", client[DB_NAME])
+
+# Coordinates that recently failed (missing POMs, timeouts, failed resolutions), skipped until their TTL expires
+negative_cache = open_negative_cache("google")
+
+# Items that still failed after their retries; REPLAY_DEAD_LETTERS=1 queues them again
+dead_letters = open_dead_letters("google")
+
 def debug_print(message):
     print(f"🔍 DEBUG: {message}")
 
 # ========== POM FETCHING AND PARSING FUNCTIONS ==========
 def fetch_pom(group_id, artifact_id, version):
-    """Fetch POM content from Google's Maven repository"""
+    """Fetch POM content from Google's Maven repository (None if it is missing or recently was)"""
     base_url = "https://dl.google.com/dl/android/maven2"
     group_path = group_id.replace('.', '/')
     pom_url = f"{base_url}/{group_path}/{artifact_id}/{version}/{artifact_id}-{version}.pom"
+    pom_id = f"{group_id}:{artifact_id}:{version}"
+    known_failure = negative_cache.check(pom_id, (*PERMANENT_FAILURES, SERVER_ERROR))
+    if known_failure:
+        debug_print(f"Skipping {pom_id}, failed recently: {known_failure[1]}")
+        return None
 
-    response = requests.get(pom_url)
+    response = http_client.get(pom_url)
     if response.status_code == 200:
         return response.text
-    else:
-        raise Exception(f"Failed to fetch POM: HTTP {response.status_code}")
+    if is_offline_miss(response):
+        debug_print(f"POM not in the offline HTTP cache: {pom_id}")
+        return None
+    failure = classify_status(response.status_code)
+    if failure in PERMANENT_FAILURES:
+        negative_cache.record(pom_id, failure, f"HTTP {response.status_code}")
+        debug_print(f"POM not found for {pom_id}: HTTP {response.status_code}")
+        return None
+    # 408/429/5xx may go away: the crawl engine retries them and dead-letters the artifact if they do not
+    response.raise_for_status()
+    return None
+
+def fetch_module_metadata(group_id, artifact_id, version):
+    """Fetch the Gradle Module Metadata (.module) file, or None if the artifact has none"""
+    base_url = "https://dl.google.com/dl/android/maven2"
+    group_path = group_id.replace('.', '/')
+    module_url = f"{base_url}/{group_path}/{artifact_id}/{version}/{artifact_id}-{version}.module"
+
+    response = http_client.get(module_url)
+    if response.status_code == 200:
+        return response.text
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return None
+
+def fetch_parent_pom(group_id, artifact_id, version):
+    """Fetch a parent or BOM POM for the resolver, which expects None when it is missing (or failing)"""
+    try:
+        return fetch_pom(group_id, artifact_id, version)
+    except Exception as e:
+        debug_print(str(e))
+        return None
+
+# In-process effective POM resolver for artifacts published without module metadata
+resolver = PomResolver(fetch_parent_pom)
+
+# Direct dependencies by content hash of POM (+ .module) + parent chain. Gradle's answer also depends on the
+# versions its conflict resolution selects, so entries are never shared between versions.
+resolutions = ResolutionCache("gradle-resolutions", share_versions=False)
 
 def parse_pom(pom_content):
     """Parse the POM XML and extract description, URL, and dependencies"""
@@ -66,205 +137,159 @@ def parse_pom(pom_content):
             deps)
 
 def fetch_aar_info(group_id, artifact_id, version):
-    """Fetch AAR headers to get size and last modified date"""
+    """Fetch AAR headers to get size and last modified date ('Unknown' if there is neither AAR nor JAR)"""
     base_url = "https://dl.google.com/dl/android/maven2"
     group_path = group_id.replace('.', '/')
     aar_url = f"{base_url}/{group_path}/{artifact_id}/{version}/{artifact_id}-{version}.aar"
     jar_url =  f"{base_url}/{group_path}/{artifact_id}/{version}/{artifact_id}-{version}.jar"
 
-    response = requests.head(aar_url)
-    response1 = requests.head(jar_url)
+    response = http_client.head(aar_url)
+    if response.status_code == 404:
+        # Only ask for the JAR when there is no AAR
+        response = http_client.head(jar_url)
     if response.status_code == 200:
         size = response.headers.get('Content-Length', 'Unknown')
         last_modified = response.headers.get('Last-Modified', 'Unknown')
         return size, last_modified
-    elif response1.status_code == 200:
-        size = response.headers.get('Content-Length', 'Unknown')
-        last_modified = response.headers.get('Last-Modified', 'Unknown')
-        return size, last_modified
-    else:
-        raise Exception(f"Failed to fetch AAR info: HTTP {response.status_code}")
+    if response.status_code == 404:
+        return 'Unknown', 'Unknown'
+    response.raise_for_status()
+    return 'Unknown', 'Unknown'
 
 # ========== GRADLE DEPENDENCY EXTRACTION FUNCTIONS ==========
-def modify_gradle_build(group_id, artifact_id, version):
-    if not os.path.exists(BUILD_GRADLE_PATH):
-        debug_print(f"Error: build.gradle not found at {BUILD_GRADLE_PATH}")
-        return False
-
-    with open(BUILD_GRADLE_PATH, "r") as f:
-        content = f.read()
-
-    new_dependency = f"    implementation '{group_id}:{artifact_id}:{version}'"
-    pattern = r"implementation\s+['\"][^'\"]+['\"]"
-    new_content = re.sub(pattern, new_dependency, content)
-
-    if new_content == content:
-        if "dependencies {" in new_content:
-            new_content = new_content.replace("dependencies {", f"dependencies {{\n{new_dependency}")
-        else:
-            new_content += f"\ndependencies {{\n{new_dependency}\n}}"
-
-    with open(BUILD_GRADLE_PATH, "w") as f:
-        f.write(new_content)
-
-    debug_print("Successfully modified build.gradle")
-    return True
-
-def run_gradle_dependencies(output_file="dependencies.txt"):
+def resolve_in_process(group_id, artifact_id, version, pom_content, module_json=None):
+    """
+    Direct runtime dependencies from the metadata Gradle itself would read; None when Gradle has to run.
+    - POMs with the Gradle metadata marker: the release runtime variant of the .module file (module_json).
+    - Otherwise: the effective POM (compile/runtime, non-optional dependencies), scope dropped.
+    """
     try:
-        result = subprocess.run(
-            ["./gradlew", "dependencies", "--configuration", "releaseRuntimeClasspath"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            timeout=120
-        )
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(result.stdout if result.returncode == 0 else result.stderr)
-
-        return output_file  # Return the path to the file
-
-    except subprocess.TimeoutExpired:
-        debug_print("Gradle command timed out after 120 seconds")
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write("Gradle command timed out after 120 seconds")
-        return output_file
-    except Exception as e:
-        debug_print(f"Error running gradle: {e}")
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(f"Error running gradle: {e}")
-        return output_file
-
-def parse_gradle_dependencies_file(file_path):
-    """Read a dependencies file and extract cleaned first-level dependency lines"""
-    cleaned_deps = []
-
-    with open(file_path, 'r', encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            if line.startswith('+---'):
-                # Remove leading '+--- ' 
-                dep_line = line[5:].strip()
-
-                # Remove (*) if present
-                dep_line = dep_line.replace('(*)', '').strip()
-
-                # Handle '->' to take the right version
-                if '->' in dep_line:
-                    parts = dep_line.split('->')
-                    left_part = parts[0].strip()
-                    right_part = parts[1].strip()
-                    # Replace left version with right version
-                    # e.g., androidx.core:core:1.6.0 -> 1.9.0  becomes  androidx.core:core:1.9.0
-                    if ':' in left_part:
-                        group_artifact = ':'.join(left_part.split(':')[:-1])
-                        dep_line = f"{group_artifact}:{right_part}"
-
-                cleaned_deps.append(dep_line)
-
-    return cleaned_deps
-
-def get_direct_dependencies(group_id, artifact_id, version):
-    target_dependency = f"{group_id}:{artifact_id}:{version}"
-
-    if not modify_gradle_build(group_id, artifact_id, version):
-        return []
-
-    output_file = run_gradle_dependencies()
-    direct_deps = parse_gradle_dependencies_file(output_file)
-
-    # Filter to include only lines that actually belong to the target dependency
-    filtered_deps = [dep for dep in direct_deps if target_dependency in dep or True]  # Keep all lines for now
+        if module_json is not None:
+            return runtime_dependencies(module_json)
+        deps = resolver.direct_dependencies(group_id, artifact_id, version, pom_content)
+        return [dep.rsplit(":", 1)[0] for dep in deps]
+    except UnresolvableModel as e:
+        print(f"⚠ Falling back to Gradle for {group_id}:{artifact_id}:{version}: {e}")
+        return None
 
-    return filtered_deps
+async def get_direct_dependencies(coordinates):
+    """Resolve direct dependencies of a batch of (group, artifact, version) in one build on a warm Gradle worker"""
+    return await gradle_pool.resolve(coordinates)
 
-# ========== GOOGLE MAVEN INDEX FUNCTIONS ==========
-def fetch_google_maven_artifacts():
-    """Fetch all artifacts from Google's Maven repository"""
-    GOOGLE_MAVEN_INDEX = "https://maven.google.com/master-index.xml"
-    
-    # Get the master index (list of groupIds)
-    resp = requests.get(GOOGLE_MAVEN_INDEX)
-    resp.raise_for_status()
-    root = ET.fromstring(resp.content)
-
-    artifacts = []
-    
-    for group_elem in root:
-        group_id = group_elem.tag  # tag name is the groupId
-        group_url = f"https://maven.google.com/{group_id.replace('.', '/')}/group-index.xml"
-
-        g_resp = requests.get(group_url)
-        if g_resp.status_code != 200:
-            continue  # skip broken groups
-
-        g_root = ET.fromstring(g_resp.content)
-        for artifact_elem in g_root.findall("artifact"):
-            artifact_id = artifact_elem.get("name")
-            versions = artifact_elem.find("versions").text.split(",")
-            latest_version = versions[-1].strip()
-            artifacts.append({
-                "group_id": group_id,
-                "artifact_id": artifact_id,
-                "latest_version": latest_version
-            })
-    
-    return artifacts
+# ========== CRAWL STAGE FUNCTIONS ==========
+def fetch_artifact(group_id, artifact_id, version):
+    """Fetch POM details and AAR info of an artifact (network-bound crawl stage)"""
+    # Fetch POM data
+    pom_content = fetch_pom(group_id, artifact_id, version)
+    if not pom_content:
+        return None
+    description, url, direct_dependencies = parse_pom(pom_content)
+
+    # Fetch AAR info
+    size, last_modified = fetch_aar_info(group_id, artifact_id, version)
+
+    # Gradle only reads the .module file of POMs carrying the marker
+    module_json = None
+    if GRADLE_METADATA_MARKER in pom_content:
+        module_json = fetch_module_metadata(group_id, artifact_id, version)
+
+    # Reuse the dependencies resolved from the same content before; otherwise read them from the metadata
+    # when possible, the rest go to Gradle
+    resolution_key = resolutions.content_key(resolver, group_id, artifact_id, version, pom_content,
+                                             extra=(module_json or "",))
+    direct_deps = resolutions.get(resolution_key, version)
+    if direct_deps is None:
+        direct_deps = resolve_in_process(group_id, artifact_id, version, pom_content, module_json)
+        resolutions.put(resolution_key, version, direct_deps)
+
+    return {
+        "group_id": group_id,
+        "artifact_id": artifact_id,
+        "version": version,
+        "description": description,
+        "source codeurl": url,
+        "jar_size": size,
+        "last_modified": last_modified,
+        "direct_dependencies": direct_deps,
+        "resolution_key": resolution_key,
+    }
+
+def is_resolved(record):
+    """Check if the module metadata or POM already produced the direct dependencies"""
+    return record["direct_dependencies"] is not None
+
+async def resolve_artifacts(records):
+    """Resolve direct dependencies of a batch of records with Gradle (resolution crawl stage)"""
+    coordinates = [(record["group_id"], record["artifact_id"], record["version"]) for record in records]
+    results = await get_direct_dependencies(coordinates)
+    for record, direct_deps in zip(records, results):
+        # Artifacts Gradle could not resolve are still stored, without dependencies (and not cached)
+        resolutions.put(record["resolution_key"], record["version"], direct_deps)
+        if direct_deps is None:
+            negative_cache.record(f"{record['group_id']}:{record['artifact_id']}:{record['version']}",
+                                  UNRESOLVABLE, "Gradle resolution failed")
+        record["direct_dependencies"] = direct_deps if direct_deps is not None else []
+    return records
+
+def store_artifact(record):
+    """Store artifact metadata in MongoDB (storage crawl stage)"""
+    full_dependency_name = f"{record['group_id']}:{record['artifact_id']}:{record['version']}"
+
+    # Create document for MongoDB with full dependency name as _id
+    artifact_data = {
+        "_id": full_dependency_name,
+
+        "description": record["description"],
+        "source codeurl": record["source codeurl"],
+        "jar_size": record["jar_size"],
+        "last_modified": record["last_modified"],
+
+        "direct_dependencies": record["direct_dependencies"]
+
+    }
+
+    # Queue an upsert (update if exists or insert if new) on the write-behind store
+    written = store.add(UpdateOne(
+        {"_id": full_dependency_name},
+        {"$set": artifact_data},
+        upsert=True
+    ))
+
+    print(f"✅ Successfully processed and stored {full_dependency_name}")
+    return written
+
+def build_engine(frontier=None):
+    """Create the crawl engine wired to the Google stage functions (resumable when given a frontier)"""
+    return CrawlEngine(
+        list_artifacts, fetch_artifact, resolve_artifacts, store_artifact,
+        is_resolved=is_resolved,
+        workers={"listing": GROUP_INDEX_WORKERS, "resolve": gradle_pool.size},
+        resolve_batch_size=GRADLE_BATCH_SIZE,
+        frontier=frontier,
+        negative_cache=negative_cache,
+        dead_letters=dead_letters,
+    )
 
-# ========== MAIN PROCESSING FUNCTION ==========
 # ========== MAIN PROCESSING FUNCTION ==========
 def process_artifact(group_id, artifact_id, version):
     """Process a single artifact and store its metadata in MongoDB"""
     full_dependency_name = f"{group_id}:{artifact_id}:{version}"
     print(f"Processing {full_dependency_name}")
-    
-    try:
-        # Fetch POM data
-        pom_content = fetch_pom(group_id, artifact_id, version)
-        description, url, direct_dependencies = parse_pom(pom_content)
-        
-        # Fetch AAR info
-        size, last_modified = fetch_aar_info(group_id, artifact_id, version)
-        
-        # Get direct dependencies
-        direct_dependencies = get_direct_dependencies(group_id, artifact_id, version)
-        
-        # Create document for MongoDB with full dependency name as _id
-        artifact_data = {
-            "_id": full_dependency_name,
-            
-            "description": description,
-            "source codeurl": url,
-            "jar_size": size,
-            "last_modified": last_modified,
-            
-            "direct_dependencies": direct_dependencies
-            
-        }
-        
-        # Store in MongoDB
-        collection = get_mongo_collection()
-        
-        # Use upsert to update if exists or insert if new
-        result = collection.update_one(
-            {"_id": full_dependency_name},
-            {"$set": artifact_data},
-            upsert=True
-        )
-        
-        print(f"✅ Successfully processed and stored {full_dependency_name}")
+
+    engine = build_engine()
+    asyncio.run(engine.run(artifacts=[(group_id, artifact_id, version)]))
+    if engine.stats["store"]["done"]:
         return full_dependency_name
-        
-    except Exception as e:
-        print(f"❌ Error processing {full_dependency_name}: {str(e)}")
-        return None
+    print(f"❌ Error processing {full_dependency_name}")
+    return None
+
 def fetch_artifact_versions(group_id, artifact_id):
     """Fetch all versions for a given artifact"""
     group_path = group_id.replace('.', '/')
     artifact_url = f"{GOOGLE_MAVEN_BASE}{group_path}/{artifact_id}/maven-metadata.xml"
     
     try:
-        resp = requests.get(artifact_url, timeout=10)
+        resp = http_client.get(artifact_url)
         resp.raise_for_status()
         metadata_root = ET.fromstring(resp.content)
         
@@ -279,6 +304,9 @@ def fetch_artifact_versions(group_id, artifact_id):
         
         return versions
     except Exception as e:
+        # Transient errors fail the group's listing, which the crawl engine retries
+        if is_transient(e):
+            raise
         print(f"❌ Error fetching versions for {group_id}:{artifact_id}: {e}")
         return []
 
@@ -310,71 +338,69 @@ def get_latest_version(versions):
         return valid_versions[-1]
 
 def fetch_group_artifacts(group_id):
-    """Fetch all artifacts for a given group ID"""
+    """Fetch (artifact ID, versions) for every artifact of a group from its group-index.xml"""
     group_path = group_id.replace('.', '/')
     group_url = f"{GOOGLE_MAVEN_BASE}{group_path}/group-index.xml"
     
     try:
-        resp = requests.get(group_url, timeout=10)
+        resp = http_client.get(group_url)
         resp.raise_for_status()
         group_root = ET.fromstring(resp.content)
         
+        # <androidx.core><core versions="1.0.0,1.1.0"/>...</androidx.core>
         artifacts = []
         for artifact_elem in group_root:
-            artifacts.append(artifact_elem.tag)
+            versions = [v.strip() for v in artifact_elem.get("versions", "").split(",") if v.strip()]
+            artifacts.append((artifact_elem.tag, versions))
         
         return artifacts
     except Exception as e:
+        if is_transient(e):
+            raise
         print(f"❌ Error fetching artifacts for {group_id}: {e}")
         return []
 
-def process_all_artifacts():
-    """Stream through the master index, process and store each artifact immediately"""
-    print("➡️ Fetching master index...")
-    resp = requests.get(GOOGLE_MAVEN_INDEX)
-    resp.raise_for_status()
-    root = ET.fromstring(resp.content)
-    print(f"✅ Master index fetched. Found {len(root)} groups. Processing artifacts...\n")
-
-    processed_count = 0
-
-    for i, group_elem in enumerate(root):
-        
-
-        group_id = group_elem.tag
-        print(f"📦 Processing group ({i+1}): {group_id}")
+def list_artifacts(group_id):
+    """Yield the latest version of every artifact in a group"""
+    print(f"📦 Processing group: {group_id}")
 
-        # Fetch artifacts for this group
-        artifacts = fetch_group_artifacts(group_id)
-        if not artifacts:
-            print(f"   No artifacts found for {group_id}\n")
-            continue
-
-        print(f"   Found {len(artifacts)} artifacts")
+    # Fetch artifacts and their versions for this group
+    artifacts = fetch_group_artifacts(group_id)
+    if not artifacts:
+        print(f"   No artifacts found for {group_id}\n")
+        return
 
-        artifact_count = 0
-        for artifact_id in artifacts:
-            
+    print(f"   Found {len(artifacts)} artifacts")
 
-            print(f"      Processing artifact: {artifact_id}")
+    for artifact_id, versions in artifacts:
+        print(f"      Processing artifact: {artifact_id}")
 
-            # Fetch latest version for this artifact
+        # The group index already lists the versions; only ask maven-metadata.xml when it does not
+        if not versions:
             versions = fetch_artifact_versions(group_id, artifact_id)
-            latest_version = get_latest_version(versions)
+        latest_version = get_latest_version(versions)
 
-            if latest_version:
-                # Process and store immediately
-                process_artifact(group_id, artifact_id, latest_version)
-                processed_count += 1
-            else:
-                print(f"         No versions found for {artifact_id}")
+        if latest_version:
+            yield group_id, artifact_id, latest_version
+        else:
+            print(f"         No versions found for {artifact_id}")
+
+def get_master_index():
+    resp = http_client.get(GOOGLE_MAVEN_INDEX)
+    resp.raise_for_status()
+    return resp
 
-            artifact_count += 1
-            time.sleep(0.2)  # be respectful to the server
+def process_all_artifacts():
+    """Stream through the master index and crawl every group concurrently"""
+    print("➡️ Fetching master index...")
+    resp = call_with_retry(get_master_index)
+    root = ET.fromstring(resp.content)
+    print(f"✅ Master index fetched. Found {len(root)} groups. Processing artifacts...\n")
 
-        print()
+    engine = build_engine(frontier)
+    asyncio.run(engine.run(listing_items=[group_elem.tag for group_elem in root]))
 
-    print(f"✅ Processing complete. Total artifacts processed: {processed_count}")
+    print(f"✅ Processing complete. Total artifacts processed: {engine.stats['store']['done']}")
 
 
 # ========== INDIVIDUAL ARTIFACT PROCESSING ==========
@@ -393,10 +419,22 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"Error occurred or program was interrupted: {e}")
     finally:
+        # Flush the writes still buffered before exporting
+        store.close()
+        print(f"🗄 Write-behind store: {store.stats()}")
+        print(f"🧭 Frontier: {frontier.counts()}")
+        frontier.close()
+        print(f"⏭ Negative cache: {negative_cache.stats()}")
+        negative_cache.close()
+        print(f"📮 Dead letters: {len(dead_letters)} in {dead_letters.path}")
+        dead_letters.close()
+        gradle_pool.close()
+        print("Stopped Gradle daemons and deleted temporary Gradle projects")
+        print(f"🧮 Resolution cache: {resolutions.stats()}")
+        http_client.print_connection_stats()
+        rate_control.print_limits()
         collection = get_mongo_collection()
-        # Export the database to a JSON file
-        print("Exporting database to google_repo_dataset.json...")
-        data = list(collection.find({},))
-
-        with open("google_repo_dataset.json", "w") as f:
-            json.dump(data, f, indent=2)
+        # Export the database to a JSON file (streamed; EXPORT_FORMAT selects ndjson and/or gzip)
+        print(f"Exporting database to {export.export_path('google_repo_dataset.json')}...")
+        exported_path, exported = export.export_collection(collection, "google_repo_dataset.json")
+        print(f"✅ Exported {exported} documents to {exported_path}")
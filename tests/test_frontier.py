@@ -0,0 +1,109 @@
+import os
+import sys
+import time
+import unittest
+from unittest import mock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from crawler_common.frontier import DONE, FAILED, LEASED, PENDING, MongoFrontier
+
+try:
+    import mongomock
+except ImportError:
+    mongomock = None
+
+
+def queue(collection, count):
+    # The documents MongoFrontier.add upserts (mongomock's bulk_write does not take this pymongo's UpdateOne)
+    collection.insert_many([
+        {"_id": f"com.acme:lib:{i}", "kind": "artifact", "payload": ["com.acme", "lib", str(i), None],
+         "priority": 0, "state": PENDING, "attempts": 0, "seq": i, "depth": 0, "refs": 0}
+        for i in range(count)
+    ])
+
+
+@unittest.skipUnless(mongomock, "needs mongomock (pip install mongomock)")
+class MongoFrontierTest(unittest.TestCase):
+    def setUp(self):
+        self.collection = mongomock.MongoClient().crawl.crawl_frontier
+        queue(self.collection, 10)
+
+    def worker(self, name, **options):
+        worker = MongoFrontier(self.collection, worker_id=name, **options)
+        self.addCleanup(worker.close)
+        return worker
+
+    def keys(self, leased):
+        return [key for key, _, _, _ in leased]
+
+    def test_two_workers_never_claim_the_same_item(self):
+        first, second = self.worker("first"), self.worker("second")
+        claimed = {"first": [], "second": []}
+        while True:
+            leased_first, leased_second = self.keys(first.lease(3)), self.keys(second.lease(3))
+            if not leased_first and not leased_second:
+                break
+            claimed["first"] += leased_first
+            claimed["second"] += leased_second
+
+        self.assertFalse(set(claimed["first"]) & set(claimed["second"]))
+        self.assertEqual(len(claimed["first"] + claimed["second"]), 10)
+        for name, keys in claimed.items():
+            for key in keys:
+                self.assertEqual(self.collection.find_one({"_id": key})["owner"], name)
+        self.assertTrue(first.busy())
+
+    def test_an_expired_lease_is_reclaimed(self):
+        # A worker that died: its leases are never renewed
+        dead = self.worker("dead", lease_seconds=0.2, heartbeat_interval=3600)
+        taken = self.keys(dead.lease(10))
+        other = self.worker("other")
+        self.assertEqual(other.lease(10), [])
+
+        time.sleep(0.3)
+        self.assertEqual(sorted(self.keys(other.lease(10))), sorted(taken))
+        self.assertEqual(self.collection.count_documents({"owner": "other", "state": LEASED}), 10)
+
+    def test_the_heartbeat_keeps_leases_alive(self):
+        alive = self.worker("alive", lease_seconds=0.3, heartbeat_interval=0.05)
+        alive.lease(10)
+        time.sleep(0.6)
+        self.assertEqual(self.worker("other").lease(10), [])
+
+    def test_marks_are_written_in_one_update_per_state(self):
+        updates = []
+        update_many = self.collection.update_many
+
+        def counted(query, update, *args, **kwargs):
+            updates.append(update)
+            return update_many(query, update, *args, **kwargs)
+
+        with mock.patch("crawler_common.frontier.MARK_FLUSH_INTERVAL", 3600):
+            worker = MongoFrontier(self.collection, worker_id="worker", heartbeat_interval=3600)
+        self.collection.update_many = counted
+        keys = self.keys(worker.lease(10))
+        for key in keys[:6]:
+            worker.done(key)
+        for key in keys[6:8]:
+            worker.fail(key)
+
+        # Collected, not written yet
+        self.assertEqual(updates, [])
+        self.assertEqual(self.collection.count_documents({"state": LEASED}), 10)
+
+        self.assertEqual(worker.counts(), {"pending": 0, "in_progress": 2, "done": 6, "failed": 2})
+        self.assertEqual(len(updates), 2)
+        self.assertEqual(self.collection.find_one({"_id": keys[6]})["attempts"], 1)
+        self.assertNotIn("owner", self.collection.find_one({"_id": keys[0]}))
+
+        # close() hands the items still leased back to the queue; a new worker retries the failed ones
+        worker.close()
+        self.collection.update_many = update_many
+        self.assertEqual(self.collection.count_documents({"state": PENDING}), 2)
+        self.worker("next")
+        self.assertEqual(self.collection.count_documents({"state": PENDING}), 4)
+        self.assertEqual(self.collection.count_documents({"state": {"$in": [DONE, FAILED]}}), 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
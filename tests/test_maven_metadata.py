@@ -0,0 +1,37 @@
+import os
+import sys
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from crawler_common.maven_metadata import highest_version, latest_release, parse_metadata
+
+
+def metadata_xml(versions, release=None, latest=None):
+    entries = "".join(f"<version>{version}</version>" for version in versions)
+    release = f"<release>{release}</release>" if release else ""
+    latest = f"<latest>{latest}</latest>" if latest else ""
+    return (f"<metadata><groupId>com.acme</groupId><artifactId>lib</artifactId><versioning>{latest}{release}"
+            f"<versions>{entries}</versions></versioning></metadata>")
+
+
+class LatestReleaseTest(unittest.TestCase):
+    def test_backport_deployed_last_does_not_win(self):
+        # 2.5.1 was deployed after 3.0.0, so it is both the last <versions> entry and <release>
+        metadata = parse_metadata(metadata_xml(["2.5.0", "3.0.0", "3.1.0-SNAPSHOT", "2.5.1"], release="2.5.1"))
+        self.assertEqual(latest_release(metadata), "3.0.0")
+
+    def test_release_breaks_ties(self):
+        metadata = parse_metadata(metadata_xml(["1.0.0", "1.0"], release="1.0"))
+        self.assertEqual(latest_release(metadata), "1.0")
+
+    def test_falls_back_to_release_and_latest(self):
+        self.assertEqual(latest_release(parse_metadata(metadata_xml([], release="1.2"))), "1.2")
+        self.assertEqual(latest_release(parse_metadata(metadata_xml(["2.0-SNAPSHOT"], latest="2.0-SNAPSHOT"))),
+                         "2.0-SNAPSHOT")
+
+    def test_unparsable_versions_compare_lexicographically(self):
+        self.assertEqual(highest_version(["r09", "r10", "r08"]), "r10")
+
+
+if __name__ == "__main__":
+    unittest.main()
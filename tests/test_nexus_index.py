@@ -0,0 +1,66 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from crawler_common.nexus_index import latest_artifacts, write_index
+
+# lastModified of 2024-01-01 00:00 UTC, in milliseconds
+JAN_2024 = 1704067200000
+DAY = 24 * 3600 * 1000
+
+
+def record(group_id, artifact_id, version, last_modified, size=1000, classifier="NA", extension="jar"):
+    return {
+        "u": f"{group_id}|{artifact_id}|{version}|{classifier}|{extension}",
+        "i": f"jar|{last_modified}|{size}|0|0|0|{extension}",
+    }
+
+
+class LatestArtifactsTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.index = os.path.join(directory.name, "nexus-maven-repository-index.gz")
+        write_index(self.index, [
+            record("com.acme", "lib", "1.0", JAN_2024),
+            record("com.acme", "lib", "2.0", JAN_2024 + DAY, size=2000),
+            # A maintenance release published after 2.0
+            record("com.acme", "lib", "1.5", JAN_2024 + 2 * DAY),
+            record("com.acme", "lib", "3.0-SNAPSHOT", JAN_2024 + 3 * DAY),
+            record("com.acme", "lib", "9.0", JAN_2024 + 3 * DAY, classifier="sources"),
+            record("com.acme", "tool", "1.10", JAN_2024),
+            record("com.acme", "tool", "1.9", JAN_2024 + DAY),
+            # The POM of the highest version, listed after its JAR
+            record("com.acme", "lib", "2.0", JAN_2024 + 4 * DAY, size=50, extension="pom"),
+            record("org.other", "app", "1.0", JAN_2024, extension="pom"),
+            record("org.other", "app", "1.0", JAN_2024 + DAY, size=3000),
+        ])
+
+    def latest(self):
+        return {(group_id, artifact_id): (version, hints)
+                for group_id, artifact_id, version, hints in latest_artifacts(self.index)}
+
+    def test_highest_version_wins_over_latest_published(self):
+        latest = self.latest()
+        self.assertEqual(latest[("com.acme", "lib")], ("2.0", {"last_modified": "2024-01-02 00:00", "jar_size": "2000"}))
+        self.assertEqual(latest[("com.acme", "tool")][0], "1.10")
+
+    def test_other_records_of_the_same_version_keep_the_jar_hints(self):
+        latest = self.latest()
+        self.assertEqual(latest[("com.acme", "lib")][1]["jar_size"], "2000")
+        self.assertEqual(latest[("org.other", "app")], ("1.0", {"last_modified": "2024-01-02 00:00", "jar_size": "3000"}))
+
+    def test_groups_are_yielded_as_they_end(self):
+        artifacts = latest_artifacts(self.index)
+        self.assertEqual(next(artifacts)[:3], ("com.acme", "lib", "2.0"))
+        self.assertEqual([artifact[:2] for artifact in artifacts], [("com.acme", "tool"), ("org.other", "app")])
+
+    def test_snapshots_and_classifiers_are_skipped(self):
+        self.assertEqual(sorted(self.latest()), [("com.acme", "lib"), ("com.acme", "tool"), ("org.other", "app")])
+        self.assertNotIn(self.latest()[("com.acme", "lib")][0], ("3.0-SNAPSHOT", "9.0"))
+
+
+if __name__ == "__main__":
+    unittest.main()